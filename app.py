@@ -3,15 +3,32 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
+from itertools import islice
+import heapq
 import uuid
 import json
 
+import profiling
+from history import ShowHistory
+from live_sync import ShowSync
+from patterns import (
+    expand_cue,
+    expand_fireworks,
+    is_pattern,
+    parse_offsets,
+    pattern_tail,
+)
+from show_diff import diff_shows, is_empty, three_way_merge
+from safety import SafetyChecker
+from show_index import ShowIndex
+
 # Import Firebase functions (comment out if not using Firebase)
 from firebase_config import (
     save_show_to_firebase,
     load_show_from_firebase,
     get_user_shows,
     # delete_show_from_firebase,
+    FirestoreCueFeed,
 )
 
 """
@@ -27,6 +44,20 @@ if "selected_firework_id" not in st.session_state:
     st.session_state.selected_firework_id = None
 if "edit_mode" not in st.session_state:
     st.session_state.edit_mode = "Add New"
+if "history" not in st.session_state:
+    st.session_state.history = ShowHistory()
+if "pending_show" not in st.session_state:
+    st.session_state.pending_show = None  # imported/loaded show awaiting review
+if "show_base" not in st.session_state:
+    st.session_state.show_base = None  # last imported/loaded/saved version, for merges
+if "live_sync" not in st.session_state:
+    st.session_state.live_sync = None  # ShowSync while a live session is active
+if "safety_checker" not in st.session_state:
+    st.session_state.safety_checker = SafetyChecker()
+if "audience_zones" not in st.session_state:
+    st.session_state.audience_zones = []  # rectangles {name, x0, y0, x1, y1} in meters
+if "show_index" not in st.session_state:
+    st.session_state.show_index = ShowIndex()
 
 
 def calculate_end_time(start_time, fuse_duration, explosion_duration):
@@ -34,6 +65,21 @@ def calculate_end_time(start_time, fuse_duration, explosion_duration):
     return start_time + fuse_duration + explosion_duration
 
 
+def parse_time_input(text):
+    """Parse a show time given as seconds ("250") or minutes:seconds ("4:10")"""
+    text = text.strip()
+    if ":" in text:
+        minutes, seconds = text.split(":", 1)
+        return int(minutes) * 60 + float(seconds)
+    return float(text)
+
+
+def format_show_time(seconds):
+    """Format seconds as m:ss.s for display"""
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}:{seconds:04.1f}"
+
+
 def get_dependent_start_time(dependent_on_id, offset=0):
     """Calculate start time based on dependency"""
     if not dependent_on_id:
@@ -72,6 +118,7 @@ def get_earliest_dependent_time(firework_id):
     return 0
 
 
+@profiling.timed("add_firework")
 def add_firework(
     name,
     start_time,
@@ -80,8 +127,12 @@ def add_firework(
     dependent_on=None,
     dependency_offset=0,
     cost=0,
+    pattern_count=1,
+    pattern_stagger=0,
+    pattern_offsets=None,
+    placement=None,
 ):
-    """Add a new firework to the list"""
+    """Add a new firework (or a pattern of several items) to the list"""
     firework_id = str(uuid.uuid4())[:8]
 
     # Calculate actual start time if dependent
@@ -90,24 +141,33 @@ def add_firework(
     else:
         actual_start_time = start_time
 
-    end_time = calculate_end_time(actual_start_time, fuse_duration, explosion_duration)
-
     firework = {
         "id": firework_id,
         "name": name,
         "start_time": actual_start_time,
         "fuse_duration": fuse_duration,
         "explosion_duration": explosion_duration,
-        "end_time": end_time,
         "dependent_on": dependent_on,
         "dependency_offset": dependency_offset,
         "cost": cost,
     }
+    if pattern_count > 1:
+        firework["pattern_count"] = pattern_count
+        firework["pattern_stagger"] = pattern_stagger
+        if pattern_offsets:
+            firework["pattern_offsets"] = pattern_offsets
+    if placement:
+        firework.update(placement)
+    # A pattern ends when its last item ends
+    firework["end_time"] = calculate_end_time(
+        actual_start_time, fuse_duration, explosion_duration
+    ) + pattern_tail(firework)
 
     st.session_state.fireworks.append(firework)
     update_dependent_fireworks()
 
 
+@profiling.timed("update_dependent_fireworks")
 def update_dependent_fireworks():
     """Update start/end times for fireworks with dependencies recursively"""
     # Keep updating until no more changes are needed (handles chain dependencies)
@@ -119,24 +179,52 @@ def update_dependent_fireworks():
         changed = False
         iteration += 1
 
-        for firework in st.session_state.fireworks:
+        for i, firework in enumerate(st.session_state.fireworks):
             if firework["dependent_on"]:
                 new_start = get_dependent_start_time(
                     firework["dependent_on"], firework["dependency_offset"]
                 )
                 new_end = calculate_end_time(
                     new_start, firework["fuse_duration"], firework["explosion_duration"]
-                )
+                ) + pattern_tail(firework)
 
                 if (
                     new_start != firework["start_time"]
                     or new_end != firework["end_time"]
                 ):
-                    firework["start_time"] = new_start
-                    firework["end_time"] = new_end
+                    # Replace rather than mutate so the show index sees the change
+                    st.session_state.fireworks[i] = {
+                        **firework,
+                        "start_time": new_start,
+                        "end_time": new_end,
+                    }
                     changed = True
 
+    profiling.count("update_dependent_fireworks.iterations", iteration)
+
+
+@profiling.timed("update_firework")
+def update_firework(firework_id, **changes):
+    """Apply field changes to a firework, then reschedule it and its dependents"""
+    for i, fw in enumerate(st.session_state.fireworks):
+        if fw["id"] == firework_id:
+            fw = {**fw, **changes}
+            if not is_pattern(fw):
+                for key in ("pattern_count", "pattern_stagger", "pattern_offsets"):
+                    fw.pop(key, None)
+            if fw["dependent_on"]:
+                fw["start_time"] = get_dependent_start_time(
+                    fw["dependent_on"], fw["dependency_offset"]
+                )
+            fw["end_time"] = calculate_end_time(
+                fw["start_time"], fw["fuse_duration"], fw["explosion_duration"]
+            ) + pattern_tail(fw)
+            st.session_state.fireworks[i] = fw
+            break
+    update_dependent_fireworks()
 
+
+@profiling.timed("remove_firework")
 def remove_firework(firework_id):
     """Remove a firework and update dependencies"""
     st.session_state.fireworks = [
@@ -144,23 +232,267 @@ def remove_firework(firework_id):
     ]
 
     # Remove dependencies on deleted firework
-    for firework in st.session_state.fireworks:
+    for i, firework in enumerate(st.session_state.fireworks):
         if firework["dependent_on"] == firework_id:
-            firework["dependent_on"] = None
-            firework["dependency_offset"] = 0
+            st.session_state.fireworks[i] = {
+                **firework,
+                "dependent_on": None,
+                "dependency_offset": 0,
+            }
+
+    update_dependent_fireworks()
+
+
+@profiling.timed("history.commit")
+def record_edit(label):
+    """Record the changes since the last recorded edit as one undo step"""
+    st.session_state.history.commit(st.session_state.fireworks, label)
+
 
+def undo_edit():
+    """Restore the show as it was before the last edit"""
+    fireworks = st.session_state.history.undo(st.session_state.fireworks)
+    if fireworks is not None:
+        st.session_state.fireworks = fireworks
+
+
+def redo_edit():
+    """Re-apply the last undone edit"""
+    fireworks = st.session_state.history.redo(st.session_state.fireworks)
+    if fireworks is not None:
+        st.session_state.fireworks = fireworks
+
+
+# Fields every cue of an imported or loaded show must have
+REQUIRED_CUE_FIELDS = (
+    "id",
+    "name",
+    "start_time",
+    "fuse_duration",
+    "explosion_duration",
+    "end_time",
+    "dependent_on",
+    "dependency_offset",
+)
+
+
+def check_show_data(data):
+    """Raise ValueError unless data is a list of cue dicts with unique ids"""
+    if not isinstance(data, list):
+        raise ValueError(
+            "expected a list of cues, as written by Export to JSON "
+            f"(got {type(data).__name__})"
+        )
+    seen = set()
+    for position, fw in enumerate(data, 1):
+        if not isinstance(fw, dict):
+            raise ValueError(f"cue {position} is not an object")
+        missing = [field for field in REQUIRED_CUE_FIELDS if field not in fw]
+        if missing:
+            raise ValueError(f"cue {position} is missing {', '.join(missing)}")
+        if fw["id"] in seen:
+            raise ValueError(f"duplicate cue id {fw['id']}")
+        seen.add(fw["id"])
+
+
+def apply_incoming_show(fireworks, label):
+    """Replace the current show with an imported or loaded one"""
+    st.session_state.fireworks = list(fireworks)
+    st.session_state.show_base = list(fireworks)
+    record_edit(label)
+
+
+def merge_incoming_show(fireworks, label):
+    """Merge an imported or loaded show into the current one.
+
+    Returns a description of each conflict.
+    """
+    base, ours = st.session_state.show_base, st.session_state.fireworks
+    merged, conflicts = three_way_merge(base, ours, fireworks)
+    names = {fw["id"]: fw["name"] for show in (base, fireworks, ours) for fw in show}
+    st.session_state.fireworks = merged
     update_dependent_fireworks()
+    st.session_state.show_base = list(fireworks)
+    record_edit(f"Merge {label}")
+    return [describe_conflict(conflict, names) for conflict in conflicts]
+
+
+def describe_conflict(conflict, names):
+    """Describe a merge conflict and how it was resolved, naming cues by name"""
+    name = names.get(conflict["id"], conflict["id"])
+    if conflict["kind"] == "edited and deleted":
+        if conflict["ours"] is None:
+            return f"{name}: you deleted it but they edited it; their cue was kept"
+        return f"{name}: they deleted it but you edited it; your cue was kept"
+    if conflict["kind"] == "missing parent":
+        parent = names.get(conflict["ours"], conflict["ours"])
+        return f"{name}: its parent {parent} was deleted; the dependency was cleared"
+    mine, theirs = conflict["ours"], conflict["theirs"]
+    if conflict["field"] == "dependent_on":
+        mine, theirs = names.get(mine, mine), names.get(theirs, theirs)
+    return (
+        f"{name}: both changed {conflict['field']}; "
+        f"yours ({mine}) was kept over theirs ({theirs})"
+    )
+
+
+def start_live_session(show_id, publish):
+    """Start exchanging cue changes with collaborators on a cloud show.
+
+    Publishing sends the current show to the live show; joining starts from an empty
+    show that the feed's first snapshot fills in.
+    """
+    if not publish:
+        st.session_state.fireworks = []
+        # The private show cannot be restored into the shared one by an undo
+        st.session_state.history.clear(st.session_state.fireworks)
+    st.session_state.live_sync = ShowSync(FirestoreCueFeed(show_id))
+
+
+def stop_live_session():
+    """Send any pending edits and stop listening to collaborators.
+
+    Returns False, staying live, if the pending edits could not be sent.
+    """
+    sync = st.session_state.live_sync
+    sync.collect_local_changes(st.session_state.fireworks)
+    sync.flush(force=True)
+    if sync.has_outgoing:
+        return False
+    sync.close()
+    st.session_state.live_sync = None
+    return True
+
+
+@profiling.timed("live_sync")
+def sync_live_show():
+    """Send local cue edits and apply collaborators' edits, delta by delta"""
+    sync = st.session_state.live_sync
+    if sync is None:
+        return
+    sync.collect_local_changes(st.session_state.fireworks)
+    sync.flush()
+    fireworks = sync.apply_incoming(st.session_state.fireworks)
+    if fireworks is not None:
+        st.session_state.fireworks = fireworks
+        update_dependent_fireworks()
+        # Not an undo step: undo only reverts this user's own edits
+        st.session_state.history.rebase(st.session_state.fireworks)
+
+
+@st.fragment(run_every=1)
+def live_sync_status():
+    """Poll the live session: rerun on incoming edits, send debounced local edits"""
+    sync = st.session_state.live_sync
+    if sync.has_incoming:
+        st.rerun()
+    sync.flush()
+    st.caption(f"🟢 Live as {sync.client_id}")
+
+
+@profiling.timed("safety.sync")
+def get_safety_conflicts():
+    """Return current safety conflicts, re-checking only cues that changed"""
+    checker = st.session_state.safety_checker
+    checker.sync(st.session_state.fireworks, st.session_state.audience_zones)
+    return checker.conflicts()
+
+
+@profiling.timed("show_index.sync")
+def get_show_index():
+    """Return the time index of the show, re-indexing only cues that changed"""
+    st.session_state.show_index.sync(st.session_state.fireworks)
+    return st.session_state.show_index
+
+
+def get_cue_order(sort_by, ascending, name_filter):
+    """Return cue ids sorted and filtered, for the cue table and cue pickers.
+
+    Orders are cached until the show changes, so paging, sorting back and forth
+    and other reruns only pay for the rows on screen.
+    """
+    index = get_show_index()
+    key = (index.version, sort_by, ascending, name_filter.lower())
+    cache = st.session_state.setdefault("cue_orders", {})
+    if key not in cache:
+        if len(cache) >= 8 or any(k[0] != index.version for k in cache):
+            cache.clear()
+        needle = name_filter.lower()
+        rows = [fw for fw in st.session_state.fireworks if needle in fw["name"].lower()]
+        missing = "" if sort_by == "name" else 0  # keep keys comparable
+        with profiling.timer("sort.cue_order"):
+            rows.sort(key=lambda fw: fw.get(sort_by) or missing, reverse=not ascending)
+        cache[key] = [fw["id"] for fw in rows]
+    return cache[key]
+
+
+PICKER_LIMIT = 50  # cues offered by a cue picker; its filter narrows them down
+
+
+def pick_cue(label, key, current_id=None, exclude_id=None, optional=False):
+    """Render a name-filtered cue selectbox and return the chosen cue id.
+
+    Only the first PICKER_LIMIT matching cues by start time are offered (plus
+    current_id), so the picker costs the same on any show size.
+    """
+    index = get_show_index()
+    needle = st.text_input(
+        f"Filter: {label}", key=f"{key}_filter", placeholder="Part of a cue name"
+    )
+    order = get_cue_order("start_time", True, needle)
+    if not order:
+        st.caption("No cue matches; showing all")
+        order = get_cue_order("start_time", True, "")
+    ids = list(islice((fw_id for fw_id in order if fw_id != exclude_id), PICKER_LIMIT))
+    if current_id and index.cue(current_id) and current_id not in ids:
+        ids.insert(0, current_id)
+    options = [None] + ids if optional else ids
+    return st.selectbox(
+        label,
+        options,
+        index=options.index(current_id) if current_id in options else 0,
+        format_func=lambda fw_id: "None" if fw_id is None else index.cue(fw_id)["name"],
+        key=key,
+    )
+
+
+# Only this much of the show is drawn (and its patterns expanded) until widened
+DEFAULT_GANTT_WINDOW = (0.0, 60.0)
+MAX_GANTT_ITEMS = 200  # bars beyond this make the chart slow and unreadable
+
 
+@profiling.timed("create_gantt_chart")
+def create_gantt_chart(window=None):
+    """Create interactive Gantt chart with clickable bars.
 
-def create_gantt_chart():
-    """Create interactive Gantt chart with clickable bars"""
+    If window is a (start, end) pair only cues overlapping it are drawn, and
+    pattern cues are expanded into their individual items for that window only.
+    At most MAX_GANTT_ITEMS items are drawn, earliest explosions first.
+    """
     if not st.session_state.fireworks:
         return go.Figure()
 
+    index = get_show_index()
+    if window:
+        visible = [index.cue(fw_id) for fw_id in index.cues_between(*window)]
+    else:
+        visible = st.session_state.fireworks
+    items = [
+        item
+        for fw in visible
+        for item in expand_cue(fw)
+        if not window
+        or (item["start_time"] <= window[1] and item["end_time"] >= window[0])
+    ]
+
     # Sort by explosion time (start_time + fuse_duration)
-    sorted_fireworks = sorted(
-        st.session_state.fireworks, key=lambda x: x["start_time"] + x["fuse_duration"]
-    )
+    with profiling.timer("sort.gantt"):
+        sorted_fireworks = heapq.nsmallest(
+            MAX_GANTT_ITEMS, items, key=lambda x: x["start_time"] + x["fuse_duration"]
+        )
+    title = "Firework Show Timeline"
+    if len(items) > len(sorted_fireworks):
+        title += f" (first {len(sorted_fireworks)} of {len(items)}; narrow the window)"
 
     fig = go.Figure()
 
@@ -210,34 +542,22 @@ def create_gantt_chart():
             )
         )
 
+    # Row of the first and of the last-ending item of each cue, for dependency lines
+    start_rows, end_rows = {}, {}
+    for i, fw in enumerate(sorted_fireworks):
+        cue_id = fw.get("pattern_id", fw["id"])
+        y_pos = len(sorted_fireworks) - i - 1
+        start_rows.setdefault(cue_id, y_pos)
+        if cue_id not in end_rows or fw["end_time"] >= end_rows[cue_id][0]:
+            end_rows[cue_id] = (fw["end_time"], y_pos)
+
     # Add dependency lines
-    for fw in st.session_state.fireworks:
+    for fw in visible:
         if fw["dependent_on"]:
-            parent_fw = next(
-                (
-                    f
-                    for f in st.session_state.fireworks
-                    if f["id"] == fw["dependent_on"]
-                ),
-                None,
-            )
-            if parent_fw:
-                parent_y = next(
-                    (
-                        len(sorted_fireworks) - i - 1
-                        for i, f in enumerate(sorted_fireworks)
-                        if f["id"] == parent_fw["id"]
-                    ),
-                    0,
-                )
-                child_y = next(
-                    (
-                        len(sorted_fireworks) - i - 1
-                        for i, f in enumerate(sorted_fireworks)
-                        if f["id"] == fw["id"]
-                    ),
-                    0,
-                )
+            parent_fw = index.cue(fw["dependent_on"])
+            if parent_fw and parent_fw["id"] in end_rows and fw["id"] in start_rows:
+                parent_y = end_rows[parent_fw["id"]][1]
+                child_y = start_rows[fw["id"]]
 
                 fig.add_trace(
                     go.Scatter(
@@ -252,7 +572,7 @@ def create_gantt_chart():
                 )
 
     fig.update_layout(
-        title="Firework Show Timeline",
+        title=title,
         xaxis_title="Time (seconds)",
         yaxis_title="Fireworks",
         yaxis=dict(
@@ -268,6 +588,374 @@ def create_gantt_chart():
     return fig
 
 
+@profiling.timed("create_statistics_chart")
+def create_statistics_chart(index, samples=200):
+    """Create cumulative cost and explosion intensity curves from the show index"""
+    times, costs = index.cost_curve(samples)
+    _, active = index.intensity_curve(samples)
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=times,
+            y=costs,
+            name="Cumulative Cost",
+            line_shape="hv",
+            line=dict(color="#FFA94D"),
+            hovertemplate="%{x:.1f}s: $%{y:.2f}<extra></extra>",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=times,
+            y=active,
+            name="Active Explosions",
+            line_shape="hv",
+            line=dict(color="#4ECDC4"),
+            yaxis="y2",
+            hovertemplate="%{x:.1f}s: %{y} active<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        title="Cost / Intensity Over Time",
+        xaxis_title="Time (seconds)",
+        yaxis=dict(title="Cost (USD)"),
+        yaxis2=dict(title="Active explosions", overlaying="y", side="right"),
+        height=350,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    return fig
+
+
+def pattern_inputs(key_prefix, fw=None):
+    """Render pattern (chase / fan / sweep) inputs; returns count, stagger, offsets"""
+    fw = fw or {}
+    with st.expander("Pattern (chase / fan / sweep)", expanded=is_pattern(fw)):
+        count = st.number_input(
+            "Number of items",
+            min_value=1,
+            max_value=1000,
+            value=int(fw.get("pattern_count", 1)),
+            step=1,
+            key=f"{key_prefix}_pattern_count",
+        )
+        stagger = st.number_input(
+            "Stagger between items (seconds)",
+            min_value=0.0,
+            value=float(fw.get("pattern_stagger", 0.0)),
+            step=0.1,
+            key=f"{key_prefix}_pattern_stagger",
+        )
+        offsets_text = st.text_input(
+            "Extra per-item offsets (optional, comma separated seconds)",
+            value=", ".join(f"{o:g}" for o in fw.get("pattern_offsets", [])),
+            key=f"{key_prefix}_pattern_offsets",
+        )
+    try:
+        offsets = parse_offsets(offsets_text)
+    except ValueError:
+        st.error("Per-item offsets must be numbers separated by commas")
+        offsets = []
+    return count, stagger, offsets
+
+
+def review_incoming_show():
+    """Show what a pending import or cloud load would change before applying it"""
+    pending = st.session_state.pending_show
+    current = st.session_state.fireworks
+    diff = diff_shows(current, pending["fireworks"])
+
+    st.header(f"Review Changes: {pending['label']}")
+    if is_empty(diff):
+        st.info("No differences from the current show")
+    else:
+        names = {fw["id"]: fw["name"] for fw in current}
+        names.update((fw["id"], fw["name"]) for fw in pending["fireworks"])
+        for col, (kind, ids) in zip(st.columns(len(diff)), diff.items()):
+            col.metric(kind.capitalize(), len(ids))
+        with st.expander("Details"):
+            for kind, ids in diff.items():
+                if ids:
+                    shown = ", ".join(names.get(fw_id, fw_id) for fw_id in ids[:50])
+                    more = f" and {len(ids) - 50} more" if len(ids) > 50 else ""
+                    st.write(f"**{kind.capitalize()}:** {shown}{more}")
+
+    col_replace, col_merge, col_cancel = st.columns(3)
+    with col_replace:
+        if st.button("Replace Current Show", key="replace_show_btn"):
+            apply_incoming_show(pending["fireworks"], pending["label"])
+            st.session_state.pending_show = None
+            st.rerun()
+    with col_merge:
+        if st.button(
+            "Merge With My Edits",
+            key="merge_show_btn",
+            disabled=st.session_state.show_base is None,
+            help="Three-way merge against the last imported, loaded or saved version",
+        ):
+            st.session_state.merge_conflicts = merge_incoming_show(
+                pending["fireworks"], pending["label"]
+            )
+            st.session_state.pending_show = None
+            st.rerun()
+    with col_cancel:
+        if st.button("Cancel", key="cancel_show_btn"):
+            st.session_state.pending_show = None
+            st.rerun()
+
+
+TABLE_SORT_FIELDS = {
+    "Start": "start_time",
+    "End": "end_time",
+    "Name": "name",
+    "Cost": "cost",
+}
+TABLE_EDITABLE_FIELDS = {
+    "Name": "name",
+    "Start (s)": "start_time",
+    "Fuse (s)": "fuse_duration",
+    "Explosion (s)": "explosion_duration",
+    "Offset (s)": "dependency_offset",
+    "Cost": "cost",
+}
+
+
+def render_cue_table():
+    """Render one page of the cue table; edits go back through update_firework"""
+    col_filter, col_sort, col_order = st.columns([2, 1, 1])
+    with col_filter:
+        name_filter = st.text_input("Filter by name", key="table_filter")
+    with col_sort:
+        sort_label = st.selectbox("Sort by", list(TABLE_SORT_FIELDS), key="table_sort")
+    with col_order:
+        ascending = st.toggle("Ascending", value=True, key="table_ascending")
+
+    order = get_cue_order(TABLE_SORT_FIELDS[sort_label], ascending, name_filter)
+    col_size, col_page = st.columns(2)
+    with col_size:
+        page_size = st.selectbox("Rows per page", [25, 50, 100], key="table_page_size")
+    page_count = max(1, -(-len(order) // page_size))
+    with col_page:
+        page = st.number_input(
+            f"Page (of {page_count})",
+            min_value=1,
+            max_value=page_count,
+            value=1,
+            step=1,
+            key="table_page",
+        )
+    page_ids = order[(page - 1) * page_size : page * page_size]
+
+    index = get_show_index()
+    rows = []
+    for fw_id in page_ids:
+        fw = index.cue(fw_id)
+        parent = index.cue(fw["dependent_on"]) if fw["dependent_on"] else None
+        rows.append(
+            {
+                "Name": fw["name"],
+                "Start (s)": fw["start_time"],
+                "Fuse (s)": fw["fuse_duration"],
+                "Explosion (s)": fw["explosion_duration"],
+                "End (s)": fw["end_time"],
+                "Depends on": parent["name"] if parent else "",
+                "Offset (s)": fw["dependency_offset"],
+                "Items": fw.get("pattern_count", 1),
+                "Cost": fw.get("cost", 0),
+                "Remove": False,
+            }
+        )
+    page_df = pd.DataFrame(rows, index=page_ids)
+
+    edited_df = st.data_editor(
+        page_df,
+        hide_index=True,
+        use_container_width=True,
+        disabled=["End (s)", "Depends on", "Items"],
+        column_config={
+            "Cost": st.column_config.NumberColumn(format="$%.2f", min_value=0.0),
+            "Fuse (s)": st.column_config.NumberColumn(min_value=0.1),
+            "Explosion (s)": st.column_config.NumberColumn(min_value=0.1),
+            "Start (s)": st.column_config.NumberColumn(min_value=0.0),
+        },
+        # A new key per show version drops stale edits once they are applied
+        key=f"cue_table_{index.version}",
+    )
+    st.caption(
+        f"{len(order)} cues. Start applies to independent cues, "
+        "offset to dependent ones."
+    )
+
+    edited = False
+    for fw_id in page_ids:
+        before, after = page_df.loc[fw_id], edited_df.loc[fw_id]
+        if after["Remove"]:
+            remove_firework(fw_id)
+            edited = True
+            continue
+        # .item() turns numpy scalars back into plain (JSON-friendly) Python values
+        changes = {
+            field: getattr(after[column], "item", lambda: after[column])()
+            for column, field in TABLE_EDITABLE_FIELDS.items()
+            if after[column] != before[column]
+        }
+        label = before["Name"] or fw_id
+        if "name" in changes and not str(changes["name"] or "").strip():
+            st.error(f"{label}: name cannot be empty")
+            continue
+        cleared = [
+            column
+            for column, field in TABLE_EDITABLE_FIELDS.items()
+            if field in changes and field != "name" and pd.isna(changes[field])
+        ]
+        if cleared:
+            st.error(f"{label}: {', '.join(cleared)} cannot be empty")
+            continue
+        if changes:
+            update_firework(fw_id, **changes)
+            edited = True
+    if edited:
+        record_edit("Edit cue table")
+        st.rerun()
+
+
+def placement_inputs(key_prefix, fw=None):
+    """Render rack position and safety radius inputs; returns the cue fields to set"""
+    fw = fw or {}
+    with st.expander("Position & Safety", expanded=fw.get("x") is not None):
+        placed = st.checkbox(
+            "Place on site map",
+            value=fw.get("x") is not None,
+            key=f"{key_prefix}_placed",
+        )
+        rack = st.text_input(
+            "Rack", value=fw.get("rack") or "", key=f"{key_prefix}_rack"
+        )
+        col_x, col_y = st.columns(2)
+        with col_x:
+            x = st.number_input(
+                "X (m)", value=float(fw.get("x") or 0.0), key=f"{key_prefix}_x"
+            )
+        with col_y:
+            y = st.number_input(
+                "Y (m)", value=float(fw.get("y") or 0.0), key=f"{key_prefix}_y"
+            )
+        safety_radius = st.number_input(
+            "Safety radius (m)",
+            min_value=0.0,
+            value=float(fw.get("safety_radius", 0.0)),
+            step=1.0,
+            key=f"{key_prefix}_safety_radius",
+        )
+    if not placed:
+        return {}
+    return {"rack": rack or None, "x": x, "y": y, "safety_radius": safety_radius}
+
+
+def render_site_safety():
+    """Render audience zones and the spatio-temporal conflicts of the show"""
+    st.header("Site Safety")
+    zones_df = st.data_editor(
+        pd.DataFrame(
+            st.session_state.audience_zones,
+            columns=["name", "x0", "y0", "x1", "y1"],
+        ),
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        key="audience_zones_editor",
+    )
+    st.caption("Audience zones: rectangles from (x0, y0) to (x1, y1) in meters")
+    st.session_state.audience_zones = [
+        {
+            "name": zone["name"] or "Audience",
+            **{corner: float(zone[corner]) for corner in ("x0", "y0", "x1", "y1")},
+        }
+        for zone in zones_df.dropna(subset=["x0", "y0", "x1", "y1"]).to_dict("records")
+    ]
+
+    conflicts = get_safety_conflicts()
+    if not conflicts:
+        st.success("No overlapping fallout zones among placed cues")
+        return
+    st.error(f"⚠️ {len(conflicts)} safety conflict(s)")
+    for conflict in conflicts[:20]:
+        first, second = conflict["names"]
+        if conflict["kind"] == "audience":
+            st.write(
+                f"- {first} reaches audience zone {second} at {conflict['start']:.1f}s"
+            )
+        else:
+            st.write(
+                f"- {first} and {second} at {conflict['start']:.1f}s "
+                f"({conflict['distance']:.1f} m apart)"
+            )
+    if len(conflicts) > 20:
+        st.write(f"...and {len(conflicts) - 20} more")
+
+
+PROFILE_DIR = "profiles"  # JSON logs and cProfile dumps of profiled reruns
+
+
+def render_profiling_panel():
+    """Render the opt-in debug panel with hot-path timings of the last rerun"""
+    st.header("Profiling")
+    if not st.checkbox(
+        "Enable profiling",
+        key="profiling_enabled",
+        help="Time hot paths and count dependency passes on every rerun",
+    ):
+        return
+    st.checkbox("Write JSON log per rerun", key="profiling_log")
+    st.checkbox("Write cProfile dump per rerun", key="profiling_cprofile")
+    if st.session_state.get("profiling_log") or st.session_state.get(
+        "profiling_cprofile"
+    ):
+        st.caption(f"Written to {PROFILE_DIR}/")
+
+    report = st.session_state.get("last_profile")
+    if report is None:
+        st.caption("Timings appear after the next rerun")
+        return
+    st.caption(f"Last rerun: {report['rerun_seconds'] * 1e3:.1f} ms")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Hot path": name,
+                    "Calls": timing["calls"],
+                    "Total (ms)": round(timing["seconds"] * 1e3, 2),
+                }
+                for name, timing in report["timings"].items()
+            ],
+            columns=["Hot path", "Calls", "Total (ms)"],
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+    for name, value in report["counters"].items():
+        st.caption(f"{name}: {value}")
+
+
+def run_profiled():
+    """Run the app, recording hot-path timings if profiling is enabled"""
+    profiling.start_rerun(
+        st.session_state.get("profiling_enabled", False),
+        profile=st.session_state.get("profiling_cprofile", False),
+    )
+    try:
+        main()
+    finally:
+        # Also runs when the script stops early for st.rerun()
+        report, profiler = profiling.finish_rerun()
+        if report is not None:
+            st.session_state.last_profile = report
+            if st.session_state.get("profiling_log"):
+                profiling.write_log(report, PROFILE_DIR)
+            if profiler is not None:
+                profiling.dump_profile(profiler, PROFILE_DIR)
+
+
 def main():
     st.set_page_config(
         page_title="Firework Show Planner", page_icon="🎆", layout="wide"
@@ -275,6 +963,70 @@ def main():
 
     st.title("🎆 Firework Show Planner")
 
+    history = st.session_state.history
+    col_undo, col_redo, _ = st.columns([1, 1, 6])
+    with col_undo:
+        if st.button(
+            "↩️ Undo",
+            disabled=not history.can_undo,
+            help=f"Undo: {history.undo_label}" if history.can_undo else None,
+        ):
+            undo_edit()
+            st.rerun()
+    with col_redo:
+        if st.button(
+            "↪️ Redo",
+            disabled=not history.can_redo,
+            help=f"Redo: {history.redo_label}" if history.can_redo else None,
+        ):
+            redo_edit()
+            st.rerun()
+
+    sync_live_show()
+
+    with st.sidebar:
+        st.header("Live Collaboration")
+        if st.session_state.live_sync is None:
+            live_show_id = st.text_input(
+                "Cloud show ID", value=st.session_state.get("last_saved_show_id", "")
+            )
+            col_publish, col_join = st.columns(2)
+            with col_publish:
+                if st.button(
+                    "Publish",
+                    disabled=not live_show_id,
+                    help="Send the current show and go live",
+                ):
+                    start_live_session(live_show_id, publish=True)
+                    st.rerun()
+            with col_join:
+                if st.button(
+                    "Join",
+                    disabled=not live_show_id,
+                    help="Replace the current show with the live one",
+                ):
+                    start_live_session(live_show_id, publish=False)
+                    st.rerun()
+        else:
+            live_sync_status()
+            if st.button("Leave Live Session"):
+                if stop_live_session():
+                    st.rerun()
+                st.error("Could not send your latest edits; try again")
+
+        render_profiling_panel()
+
+    if st.session_state.pending_show:
+        review_incoming_show()
+
+    conflicts = st.session_state.pop("merge_conflicts", None)
+    if conflicts:
+        st.warning(
+            f"Merged with {len(conflicts)} conflict(s):\n"
+            + "\n".join(f"- {message}" for message in conflicts[:20])
+            + (f"\n- ...and {len(conflicts) - 20} more" if len(conflicts) > 20 else "")
+        )
+
     col1, col2 = st.columns([1, 2])
 
     with col1:
@@ -291,33 +1043,14 @@ def main():
         st.session_state.edit_mode = mode
 
         if mode == "Edit Existing" and st.session_state.fireworks:
-            # Select firework to edit - sorted by start time
-            sorted_fireworks = sorted(
-                st.session_state.fireworks, key=lambda x: x["start_time"]
-            )
-            edit_options = [fw["name"] for fw in sorted_fireworks]
-
-            # Auto-select if chart selection exists
-            default_index = 0
-            if st.session_state.selected_firework_id:
-                try:
-                    selected_fw = next(
-                        fw
-                        for fw in st.session_state.fireworks
-                        if fw["id"] == st.session_state.selected_firework_id
-                    )
-                    if selected_fw["name"] in edit_options:
-                        default_index = edit_options.index(selected_fw["name"])
-                except StopIteration:
-                    pass
-
-            selected_fw_name = st.selectbox(
-                "Select firework to edit", edit_options, index=default_index
-            )
-            selected_fw = next(
-                fw
-                for fw in st.session_state.fireworks
-                if fw["name"] == selected_fw_name
+            # Select firework to edit - sorted by start time, or picked on the chart
+            selected_fw = get_show_index().cue(
+                pick_cue(
+                    "Select firework to edit",
+                    "edit_select",
+                    current_id=st.session_state.selected_firework_id
+                    or st.session_state.get("edit_select"),
+                )
             )
 
             # Edit form - dynamic fields outside form
@@ -326,45 +1059,16 @@ def main():
             )
 
             # Dependency selection
-            firework_options = [None] + [
-                fw["name"]
-                for fw in st.session_state.fireworks
-                if fw["id"] != selected_fw["id"]
-            ]
-            current_dep_name = None
-            current_dep_index = 0
-            if selected_fw["dependent_on"]:
-                dep_fw = next(
-                    (
-                        fw
-                        for fw in st.session_state.fireworks
-                        if fw["id"] == selected_fw["dependent_on"]
-                    ),
-                    None,
-                )
-                if dep_fw:
-                    current_dep_name = dep_fw["name"]
-                    if current_dep_name in firework_options:
-                        current_dep_index = firework_options.index(current_dep_name)
-
-            dependent_on_name = st.selectbox(
+            dependent_on_id = pick_cue(
                 "Dependent on (optional)",
-                firework_options,
-                index=current_dep_index,
-                key=f"edit_dependency_{selected_fw['id']}",
-            )  # Unique key per firework
-
-            if dependent_on_name:
-                dependent_on_id = next(
-                    fw["id"]
-                    for fw in st.session_state.fireworks
-                    if fw["name"] == dependent_on_name
-                )
-                parent_fw = next(
-                    fw
-                    for fw in st.session_state.fireworks
-                    if fw["name"] == dependent_on_name
-                )
+                f"edit_dependency_{selected_fw['id']}",  # Unique key per firework
+                current_id=selected_fw["dependent_on"],
+                exclude_id=selected_fw["id"],
+                optional=True,
+            )
+
+            if dependent_on_id:
+                parent_fw = get_show_index().cue(dependent_on_id)
 
                 dependency_offset = st.number_input(
                     "Offset from dependency (seconds)",
@@ -381,7 +1085,6 @@ def main():
                 start_time = 0.0  # Will be calculated
             else:
                 dependency_offset = 0.0
-                dependent_on_id = None
                 start_time = st.number_input(
                     "Start Time (seconds)",
                     min_value=0.0,
@@ -396,7 +1099,7 @@ def main():
                 st.warning(
                     f"⚠️ This firework has dependents. Maximum start time: {max_allowed_time:.1f}s"
                 )
-                if not dependent_on_name:  # Only constrain if not dependent
+                if not dependent_on_id:  # Only constrain if not dependent
                     start_time = st.number_input(
                         "Start Time (seconds)",
                         min_value=0.0,
@@ -427,32 +1130,33 @@ def main():
                 step=0.01,
                 key="edit_cost",
             )
+            pattern_count, pattern_stagger, pattern_offsets = pattern_inputs(
+                f"edit_{selected_fw['id']}", selected_fw
+            )
+            placement = placement_inputs(f"edit_{selected_fw['id']}", selected_fw)
 
             col_update, col_delete = st.columns(2)
             with col_update:
                 if st.button("Update Firework", key="update_btn"):
-                    # Remove old firework
-                    st.session_state.fireworks = [
-                        fw
-                        for fw in st.session_state.fireworks
-                        if fw["id"] != selected_fw["id"]
-                    ]
-                    # Add updated firework with same ID
-                    add_firework(
-                        name,
-                        start_time,
-                        fuse_duration,
-                        explosion_duration,
-                        dependent_on_id,
-                        dependency_offset,
-                        cost,
-                    )
-                    st.session_state.fireworks[-1]["id"] = selected_fw[
-                        "id"
-                    ]  # Keep same ID
-                    update_dependent_fireworks()  # Ensure all dependencies are updated
+                    changes = {
+                        "name": name,
+                        "fuse_duration": fuse_duration,
+                        "explosion_duration": explosion_duration,
+                        "dependent_on": dependent_on_id,
+                        "dependency_offset": dependency_offset,
+                        "cost": cost,
+                        "pattern_count": pattern_count,
+                        "pattern_stagger": pattern_stagger,
+                        "pattern_offsets": pattern_offsets,
+                        **(placement or {"x": None, "y": None}),
+                    }
+                    if not dependent_on_id:
+                        changes["start_time"] = start_time
+                    # Keeps the cue's id and position in the show
+                    update_firework(selected_fw["id"], **changes)
                     st.session_state.selected_firework_id = None  # Clear selection
                     st.session_state.edit_mode = "Add New"  # Reset to Add mode
+                    record_edit(f"Update {name}")
                     st.success(f"Updated {name}!")
                     st.rerun()
 
@@ -460,6 +1164,7 @@ def main():
                 if st.button("Delete Firework", key="delete_btn"):
                     remove_firework(selected_fw["id"])
                     st.session_state.selected_firework_id = None
+                    record_edit(f"Delete {selected_fw['name']}")
                     st.success(f"Deleted {selected_fw['name']}!")
                     st.rerun()
 
@@ -468,27 +1173,12 @@ def main():
             name = st.text_input("Firework Name")
 
             # Dependency selection (outside form for dynamic updates)
-            sorted_available_fireworks = sorted(
-                st.session_state.fireworks, key=lambda x: x["start_time"]
-            )
-            firework_options = [None] + [
-                fw["name"] for fw in sorted_available_fireworks
-            ]
-            dependent_on_name = st.selectbox(
-                "Dependent on (optional)", firework_options
+            dependent_on_id = pick_cue(
+                "Dependent on (optional)", "add_dependency", optional=True
             )
 
-            if dependent_on_name:
-                dependent_on_id = next(
-                    fw["id"]
-                    for fw in st.session_state.fireworks
-                    if fw["name"] == dependent_on_name
-                )
-                parent_fw = next(
-                    fw
-                    for fw in st.session_state.fireworks
-                    if fw["name"] == dependent_on_name
-                )
+            if dependent_on_id:
+                parent_fw = get_show_index().cue(dependent_on_id)
 
                 dependency_offset = st.number_input(
                     "Offset from dependency (seconds)",
@@ -504,7 +1194,6 @@ def main():
                 start_time = 0.0  # Will be calculated in add_firework
             else:
                 dependency_offset = 0.0
-                dependent_on_id = None
                 start_time = st.number_input(
                     "Start Time (seconds)", min_value=0.0, value=0.0, step=0.1
                 )
@@ -516,6 +1205,8 @@ def main():
                 "Explosion Duration (seconds)", min_value=0.1, value=3.0, step=0.1
             )
             cost = st.number_input("Cost (USD)", min_value=0.0, value=0.0, step=0.01)
+            pattern_count, pattern_stagger, pattern_offsets = pattern_inputs("add")
+            placement = placement_inputs("add")
 
             if st.button("Add Firework") and name:
                 add_firework(
@@ -526,7 +1217,12 @@ def main():
                     dependent_on_id,
                     dependency_offset,
                     cost,
+                    pattern_count,
+                    pattern_stagger,
+                    pattern_offsets,
+                    placement,
                 )
+                record_edit(f"Add {name}")
                 st.success(f"Added {name}!")
                 st.rerun()
 
@@ -537,46 +1233,66 @@ def main():
         st.header("Current Fireworks")
 
         if st.session_state.fireworks:
-            for fw in sorted(st.session_state.fireworks, key=lambda x: x["start_time"]):
-                with st.expander(f"{fw['name']} ({fw['id']})"):
-                    st.write(f"**Start:** {fw['start_time']:.1f}s")
-                    st.write(f"**Fuse:** {fw['fuse_duration']:.1f}s")
-                    st.write(f"**Explosion:** {fw['explosion_duration']:.1f}s")
-                    st.write(f"**End:** {fw['end_time']:.1f}s")
-                    if fw["dependent_on"]:
-                        dep_name = next(
-                            (
-                                f["name"]
-                                for f in st.session_state.fireworks
-                                if f["id"] == fw["dependent_on"]
-                            ),
-                            "Unknown",
-                        )
-                        st.write(
-                            f"**Depends on:** {dep_name} (+{fw['dependency_offset']:.1f}s)"
-                        )
-
-                    if st.button(f"Remove {fw['name']}", key=f"remove_{fw['id']}"):
-                        remove_firework(fw["id"])
-                        st.rerun()
+            render_cue_table()
         else:
             st.info("No fireworks added yet")
 
+        if st.session_state.fireworks:
+            render_site_safety()
+
         # Show statistics
         if st.session_state.fireworks:
             st.header("Show Statistics")
-            total_duration = max(fw["end_time"] for fw in st.session_state.fireworks)
-            total_cost = sum(fw.get("cost", 0) for fw in st.session_state.fireworks)
-            st.metric("Total Show Duration", f"{total_duration:.1f} seconds")
-            st.metric("Number of Fireworks", len(st.session_state.fireworks))
-            st.metric("Total Cost", f"${total_cost:.2f}")
+            index = get_show_index()
+            st.metric("Total Show Duration", f"{index.end_time:.1f} seconds")
+            st.metric("Number of Fireworks", len(index))
+            st.metric("Total Cost", f"${index.total_cost:.2f}")
+
+            st.subheader("What's happening between...")
+            col_from, col_to = st.columns(2)
+            with col_from:
+                window_from = st.text_input("From (m:ss or seconds)", value="0:00")
+            with col_to:
+                window_to = st.text_input(
+                    "To (m:ss or seconds)", value=format_show_time(index.end_time)
+                )
+            try:
+                t0, t1 = parse_time_input(window_from), parse_time_input(window_to)
+            except ValueError:
+                st.error("Enter times as seconds (250) or minutes:seconds (4:10)")
+            else:
+                summary = index.window_summary(t0, t1)
+                st.write(
+                    f"**{len(summary['cues'])}** cues active, "
+                    f"**{summary['launches']}** launched "
+                    f"(${summary['cost']:.2f}), "
+                    f"{summary['explosion_seconds']:.1f} explosion-seconds "
+                    f"(avg {summary['average_intensity']:.2f} at once)"
+                )
 
     with col2:
         st.header("Timeline Gantt Chart")
 
         if st.session_state.fireworks:
-            fig = create_gantt_chart()
+            # The window outlives edits: the slider resets whenever show_end moves
+            show_end = max(float(get_show_index().end_time), 1.0)
+            start, end = st.session_state.get("gantt_range", DEFAULT_GANTT_WINDOW)
+            end = min(end, show_end)
+            window = st.slider(
+                "Visible window (seconds)",
+                min_value=0.0,
+                max_value=show_end,
+                value=(min(start, end), end),
+                key="gantt_window",
+            )
+            st.session_state.gantt_range = window
+            fig = create_gantt_chart(window)
             st.plotly_chart(fig, use_container_width=True, key="gantt_chart")
+            st.plotly_chart(
+                create_statistics_chart(get_show_index()),
+                use_container_width=True,
+                key="statistics_chart",
+            )
             st.info(
                 "🎯 **Legend:**\n- 🔴 Red = Fuse duration\n- 🟢 Teal = Explosion duration\n- ➖ Gray dashed lines = Dependencies"
             )
@@ -587,8 +1303,18 @@ def main():
             col_export, col_import, col_cloud = st.columns(3)
 
             with col_export:
+                expand_patterns = st.checkbox(
+                    "Expand patterns into individual cues",
+                    help="Needed by firing systems that expect one entry per cue",
+                )
                 if st.session_state.fireworks and st.button("Export Show Data"):
-                    export_data = json.dumps(st.session_state.fireworks, indent=2)
+                    if expand_patterns:
+                        export_fireworks = list(
+                            expand_fireworks(st.session_state.fireworks)
+                        )
+                    else:
+                        export_fireworks = st.session_state.fireworks
+                    export_data = json.dumps(export_fireworks, indent=2)
                     st.download_button(
                         label="Download JSON",
                         data=export_data,
@@ -605,12 +1331,15 @@ def main():
                 ):
                     try:
                         imported_data = json.load(uploaded_file)
-                        st.session_state.fireworks = imported_data
+                        check_show_data(imported_data)
+                        st.session_state.pending_show = {
+                            "fireworks": imported_data,
+                            "label": f"Import {uploaded_file.name}",
+                        }
                         # Track processed files to prevent infinite loop
                         if "processed_files" not in st.session_state:
                             st.session_state.processed_files = set()
                         st.session_state.processed_files.add(uploaded_file)
-                        st.success("Show data imported successfully!")
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error importing data: {e}")
@@ -629,6 +1358,10 @@ def main():
                             show_name, st.session_state.fireworks
                         )
                         if show_id:
+                            st.session_state.show_base = list(
+                                st.session_state.fireworks
+                            )
+                            st.session_state.last_saved_show_id = show_id
                             st.success(f"Saved to cloud! Show ID: {show_id}")
                         # st.info("Firebase not configured yet")
 
@@ -649,9 +1382,16 @@ def main():
                         if st.button("🔄 Load Show"):
                             show_data = load_show_from_firebase(show_id)
                             if show_data:
-                                st.session_state.fireworks = show_data["fireworks"]
-                                st.success(f"Loaded: {show_data['name']}")
-                                st.rerun()
+                                try:
+                                    check_show_data(show_data.get("fireworks"))
+                                except ValueError as e:
+                                    st.error(f"Cannot load this show: {e}")
+                                else:
+                                    st.session_state.pending_show = {
+                                        "fireworks": show_data["fireworks"],
+                                        "label": f"Load {show_data['name']}",
+                                    }
+                                    st.rerun()
                 else:
                     st.info("No saved shows found")
                 # st.info("Configure Firebase to enable cloud storage")
@@ -700,6 +1440,7 @@ def main():
                         },
                     ]
                     st.session_state.fireworks = sample_fireworks
+                    record_edit("Load sample show")
                     st.rerun()
 
             with col_import:
@@ -709,7 +1450,8 @@ def main():
                 if uploaded_file:
                     try:
                         imported_data = json.load(uploaded_file)
-                        st.session_state.fireworks = imported_data
+                        check_show_data(imported_data)
+                        apply_incoming_show(imported_data, "Import show")
                         st.success("Show imported successfully!")
                         st.rerun()
                     except Exception as e:
@@ -717,4 +1459,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    run_profiled()
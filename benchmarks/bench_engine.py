@@ -0,0 +1,156 @@
+"""
+Microbenchmarks for the planner's hot paths on synthetic shows.
+
+Times add_firework, update_dependent_fireworks, remove_firework, create_gantt_chart,
+JSON export/import and Firework.from_dict/to_dict on several show shapes (long chains,
+wide fan-out, random DAGs and a large flat show). Results are written as JSON and
+compared with a stored baseline; cases slower than the threshold are flagged.
+Runs fully offline.
+
+Run from the repository root:
+    python benchmarks/bench_engine.py                      # run, compare to baseline
+    python benchmarks/bench_engine.py --update-baseline    # store a new baseline
+    python benchmarks/bench_engine.py --scale 0.1          # quick run on small shows
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+
+from common import ROOT, compare, load_app, measure
+from generators import SHAPES, catalog
+
+from firework import Firework
+from show_index import ShowIndex
+
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+DEFAULT_SIZES = {
+    "chain": 1_000,
+    "fanout": 5_000,
+    "random_dag": 5_000,
+    "flat": 100_000,
+}
+NARROW_GANTT_WINDOW = (0.0, 5.0)  # seconds; a zoomed-in view of the chart
+
+
+def shape_cases(app, shape, size):
+    """Yield (case name, func, setup) for one generated show"""
+    st = app.st
+    show = SHAPES[shape](size)
+    index = ShowIndex(show)
+    middle = show[len(show) // 2]
+    root = show[0]
+
+    def reset():
+        st.session_state.fireworks = list(show)
+        st.session_state.show_index = index
+
+    def reset_retimed():
+        # Shift the first cue; its dependents are now stale
+        reset()
+        st.session_state.fireworks[0] = {
+            **root,
+            "start_time": root["start_time"] + 1,
+            "end_time": root["end_time"] + 1,
+        }
+
+    yield "add_firework", lambda: app.add_firework("Bench", 10.0, 2.0, 3.0), reset
+    yield "add_dependent_firework", lambda: app.add_firework(
+        "Bench", 0.0, 2.0, 3.0, middle["id"], 1.0
+    ), reset
+    yield "update_dependent_fireworks", app.update_dependent_fireworks, reset_retimed
+    yield "remove_firework", lambda: app.remove_firework(middle["id"]), reset
+    # The window the app opens with, and a narrow one
+    yield "create_gantt_chart", lambda: app.create_gantt_chart(
+        app.DEFAULT_GANTT_WINDOW
+    ), reset
+    yield "create_gantt_chart_narrow", lambda: app.create_gantt_chart(
+        NARROW_GANTT_WINDOW
+    ), reset
+
+    exported = json.dumps(show, indent=2)
+    yield "json_export", lambda: json.dumps(show, indent=2), None
+    yield "json_import", lambda: json.loads(exported), None
+
+
+def catalog_cases(size):
+    products = catalog(size)
+    fireworks = [Firework.from_dict(data) for data in products]
+    yield "from_dict", lambda: [Firework.from_dict(data) for data in products], None
+    yield "to_dict", lambda: [fw.to_dict() for fw in fireworks], None
+
+
+def run(scale, repeat, shapes):
+    app = load_app()
+    results = {}
+    for shape in shapes:
+        size = max(10, int(DEFAULT_SIZES[shape] * scale))
+        for case, func, setup in shape_cases(app, shape, size):
+            name = f"{shape}/{case}"
+            results[name] = {**measure(func, setup, repeat), "size": size}
+            print(f"{name:40s} {results[name]['median'] * 1e3:10.3f} ms  (n={size})")
+    size = max(10, int(10_000 * scale))
+    for case, func, setup in catalog_cases(size):
+        name = f"catalog/{case}"
+        results[name] = {**measure(func, setup, repeat), "size": size}
+        print(f"{name:40s} {results[name]['median'] * 1e3:10.3f} ms  (n={size})")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0, help="show size factor")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--shapes", nargs="+", default=list(SHAPES), choices=SHAPES)
+    parser.add_argument(
+        "--output", default=os.path.join(BENCH_DIR, "results", "engine.json")
+    )
+    parser.add_argument(
+        "--baseline", default=os.path.join(BENCH_DIR, "baseline", "engine.json")
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=2.0,
+        help="flag cases slower than this multiple of the baseline",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.repeat, args.shapes)
+    report = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    target = args.baseline if args.update_baseline else args.output
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {target}")
+    if args.update_baseline or not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, before, after, ratio in regressions:
+        print(
+            f"REGRESSION {name}: {before * 1e3:.3f} ms -> {after * 1e3:.3f} ms "
+            f"({ratio:.2f}x)"
+        )
+    if not regressions:
+        print(f"No regressions over {args.threshold:.2f}x the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Memory benchmark for ShowHistory: 1,000 undo steps on a 5,000-cue show.
+
+Each step retimes one cue and the chain of cues that depend on it, the way
+update_dependent_fireworks does. The memory held by the history is compared with
+keeping a deep copy of the show per step.
+
+Run from the repository root:
+    python benchmarks/bench_history.py
+"""
+
+import copy
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import ShowHistory  # noqa: E402
+
+SHOW_SIZE = 5_000
+STEPS = 1_000
+CHAIN_LENGTH = 10  # each cue heads a chain of this many dependents
+
+
+def make_show(size):
+    fireworks = []
+    for i in range(size):
+        parent = fireworks[-1]["id"] if i % CHAIN_LENGTH else None
+        start = fireworks[-1]["end_time"] + 1 if parent else i * 2.0
+        fireworks.append(
+            {
+                "id": f"cue{i:05d}",
+                "name": f"Cue {i}",
+                "start_time": start,
+                "fuse_duration": 2.0,
+                "explosion_duration": 3.0,
+                "end_time": start + 5.0,
+                "dependent_on": parent,
+                "dependency_offset": 1 if parent else 0,
+                "cost": 10.0,
+            }
+        )
+    return fireworks
+
+
+def retime(fireworks, rng):
+    """Copy-on-write edit of one cue plus the rest of its dependency chain"""
+    fireworks = list(fireworks)
+    i = rng.randrange(len(fireworks))
+    shift = rng.uniform(-1, 1)
+    while True:
+        fw = fireworks[i]
+        fireworks[i] = {
+            **fw,
+            "start_time": fw["start_time"] + shift,
+            "end_time": fw["end_time"] + shift,
+        }
+        i += 1
+        if i == len(fireworks) or not fireworks[i]["dependent_on"]:
+            return fireworks
+
+
+def main():
+    rng = random.Random(42)
+    show = make_show(SHOW_SIZE)
+
+    tracemalloc.start()
+    history = ShowHistory(show, max_steps=STEPS, max_changes=STEPS * SHOW_SIZE)
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for _ in range(STEPS):
+        show = retime(show, rng)
+        history.commit(show, "Retime")
+    commit_seconds = time.perf_counter() - started
+    history_bytes = tracemalloc.get_traced_memory()[0] - baseline
+
+    started = time.perf_counter()
+    while history.can_undo:
+        show = history.undo(show)
+    undo_seconds = time.perf_counter() - started
+
+    before_copy = tracemalloc.get_traced_memory()[0]
+    snapshot = copy.deepcopy(show)
+    deepcopy_bytes = (tracemalloc.get_traced_memory()[0] - before_copy) * STEPS
+    del snapshot
+    tracemalloc.stop()
+
+    print(f"show size:              {SHOW_SIZE} cues")
+    print(f"history steps:          {STEPS}")
+    print(f"history memory:         {history_bytes / 2**20:8.2f} MiB")
+    print(f"  per step:             {history_bytes / STEPS / 1024:8.2f} KiB")
+    print(f"deep-copy history:      {deepcopy_bytes / 2**20:8.2f} MiB (estimated)")
+    print(f"commit time per step:   {commit_seconds / STEPS * 1e3:8.3f} ms")
+    print(f"undo time per step:     {undo_seconds / STEPS * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
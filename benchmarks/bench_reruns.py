@@ -0,0 +1,220 @@
+"""
+End-to-end rerun latency harness built on Streamlit's AppTest.
+
+Loads a large generated show into a headless app session (Firebase stubbed out), drives
+scripted interactions (add, edit, delete, mode toggle, import, paging) and measures,
+per interaction, the wall time of the whole script rerun and the serialized size of
+the elements it produced. p50/p95 are written as JSON and compared with a stored
+baseline; interactions slower than the threshold are flagged.
+
+Run from the repository root:
+    python benchmarks/bench_reruns.py                      # run, compare to baseline
+    python benchmarks/bench_reruns.py --update-baseline    # store a new baseline
+    python benchmarks/bench_reruns.py --size 200 --iterations 3
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+from common import (
+    APP_PATH,
+    ROOT,
+    compare,
+    install_offline_firebase,
+    percentile,
+    quiet_bare_mode,
+)
+from generators import SHAPES
+
+from streamlit.testing.v1 import AppTest
+
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+
+
+def message_bytes(node):
+    """Total serialized size of the element protos under an AppTest tree node"""
+    proto = getattr(node, "proto", None)
+    size = proto.ByteSize() if hasattr(proto, "ByteSize") else 0
+    for child in getattr(node, "children", {}).values():
+        size += message_bytes(child)
+    return size
+
+
+def button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def set_mode(at, mode):
+    at.radio(key="mode_selector").set_value(mode).run()
+
+
+# Each interaction gets an app session and a counter, prepares untimed state, and
+# returns a callable that performs exactly one timed rerun.
+
+
+def interaction_rerun(at, i):
+    return at.run
+
+
+def interaction_toggle_mode(at, i):
+    mode = "Edit Existing" if i % 2 == 0 else "Add New"
+    return at.radio(key="mode_selector").set_value(mode).run
+
+
+def interaction_add(at, i):
+    set_mode(at, "Add New")
+    next(t for t in at.text_input if t.label == "Firework Name").input(f"Added {i}")
+    return button(at, "Add Firework").click().run
+
+
+def interaction_edit(at, i):
+    set_mode(at, "Edit Existing")
+    at.number_input(key="edit_cost").set_value(float(i))
+    return button(at, "Update Firework").click().run
+
+
+def interaction_delete(at, i):
+    set_mode(at, "Edit Existing")
+    return button(at, "Delete Firework").click().run
+
+
+def interaction_next_page(at, i):
+    return at.number_input(key="table_page").set_value(1 + (i + 1) % 2).run
+
+
+def interaction_import_review(at, i):
+    # What the import uploader does with a file: stage it for review
+    incoming = list(at.session_state.fireworks)
+    for j in range(i % 10, len(incoming), 100):
+        incoming[j] = {**incoming[j], "cost": incoming[j].get("cost", 0) + 1}
+    at.session_state.pending_show = {"fireworks": incoming, "label": "Import bench"}
+    return at.run
+
+
+def interaction_import_apply(at, i):
+    interaction_import_review(at, i)()
+    return button(at, "Replace Current Show").click().run
+
+
+INTERACTIONS = {
+    "rerun": interaction_rerun,
+    "toggle_mode": interaction_toggle_mode,
+    "add": interaction_add,
+    "edit": interaction_edit,
+    "delete": interaction_delete,
+    "next_page": interaction_next_page,
+    "import_review": interaction_import_review,
+    "import_apply": interaction_import_apply,
+}
+
+# AppTest keeps widgets of a run aborted by st.rerun() in its element tree when the
+# rerun lays the page out differently, which breaks the next interaction. Deleting the
+# edited cue does that, so it gets a fresh session per iteration.
+FRESH_SESSION = {"delete"}
+
+
+def new_session(show, timeout):
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state.fireworks = list(show)
+    at.run()
+    return at
+
+
+def run(shape, size, iterations, interactions, timeout):
+    install_offline_firebase()
+    quiet_bare_mode()
+    sys.path.insert(0, ROOT)  # what `streamlit run` does for the app's own imports
+    show = SHAPES[shape](size)
+    results = {}
+    for name in interactions:
+        at = new_session(show, timeout)
+        timings, sizes = [], []
+        for i in range(iterations):
+            if i and name in FRESH_SESSION:
+                at = new_session(show, timeout)
+            rerun = INTERACTIONS[name](at, i)
+            started = time.perf_counter()
+            rerun()
+            timings.append(time.perf_counter() - started)
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].message}")
+            sizes.append(message_bytes(at._tree))
+        results[f"{shape}/{name}"] = {
+            "p50": percentile(timings, 0.5),
+            "p95": percentile(timings, 0.95),
+            "bytes_p50": percentile(sizes, 0.5),
+            "bytes_max": max(sizes),
+            "iterations": iterations,
+            "size": size,
+        }
+        result = results[f"{shape}/{name}"]
+        print(
+            f"{shape + '/' + name:28s} p50 {result['p50'] * 1e3:9.1f} ms  "
+            f"p95 {result['p95'] * 1e3:9.1f} ms  "
+            f"{result['bytes_p50'] / 1024:9.1f} KiB"
+        )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shape", default="random_dag", choices=SHAPES)
+    parser.add_argument("--size", type=int, default=1_000, help="cues in the show")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument(
+        "--interactions", nargs="+", default=list(INTERACTIONS), choices=INTERACTIONS
+    )
+    parser.add_argument("--timeout", type=float, default=300, help="seconds per rerun")
+    parser.add_argument(
+        "--output", default=os.path.join(BENCH_DIR, "results", "reruns.json")
+    )
+    parser.add_argument(
+        "--baseline", default=os.path.join(BENCH_DIR, "baseline", "reruns.json")
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=2.0,
+        help="flag interactions whose p50 exceeds this multiple of the baseline",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.shape, args.size, args.iterations, args.interactions, args.timeout
+    )
+    report = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "shape": args.shape,
+        },
+        "results": results,
+    }
+    target = args.baseline if args.update_baseline else args.output
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {target}")
+    if args.update_baseline or not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold, metric="p50")
+    regressions += compare(results, baseline, args.threshold, metric="bytes_p50")
+    for name, before, after, ratio in regressions:
+        print(f"REGRESSION {name}: {before:.4g} -> {after:.4g} ({ratio:.2f}x)")
+    if not regressions:
+        print(f"No regressions over {args.threshold:.2f}x the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Shared helpers for the benchmarks: import the app offline and time callables.
+
+The Firebase layer connects at import time, so it is replaced by an offline stand-in
+module before app.py is imported. Cloud saves and loads become no-ops and live
+sessions use an in-process feed.
+"""
+
+import logging
+import math
+import os
+import statistics
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from live_sync import InMemoryCueFeed  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+
+
+def install_offline_firebase():
+    """Register an offline firebase_config module (idempotent)"""
+    if getattr(sys.modules.get("firebase_config"), "OFFLINE", False):
+        return sys.modules["firebase_config"]
+    feeds = {}
+    offline = types.ModuleType("firebase_config")
+    offline.OFFLINE = True
+    offline.saved_shows = {}
+
+    def save_show_to_firebase(show_name, fireworks_data, user_id="anonymous"):
+        show_id = f"offline{len(offline.saved_shows):04d}"
+        offline.saved_shows[show_id] = {
+            "id": show_id,
+            "name": show_name,
+            "fireworks": fireworks_data,
+            "user_id": user_id,
+        }
+        return show_id
+
+    offline.save_show_to_firebase = save_show_to_firebase
+    offline.load_show_from_firebase = offline.saved_shows.get
+    offline.get_user_shows = lambda user_id="anonymous": list(
+        offline.saved_shows.values()
+    )
+    offline.FirestoreCueFeed = lambda show_id: feeds.setdefault(
+        show_id, InMemoryCueFeed()
+    )
+    sys.modules["firebase_config"] = offline
+    return offline
+
+
+def load_app():
+    """Import app.py as a module with the Firebase layer stubbed out"""
+    install_offline_firebase()
+    quiet_bare_mode()
+    import app
+
+    return app
+
+
+def quiet_bare_mode():
+    """Silence the warnings Streamlit logs for every st call outside `streamlit run`"""
+    # Streamlit sets its loggers' levels when it creates them, so create them first
+    import streamlit.runtime.scriptrunner_utils.script_run_context  # noqa: F401
+    import streamlit.runtime.state.session_state_proxy  # noqa: F401
+
+    for name in (
+        "streamlit.runtime.scriptrunner_utils.script_run_context",
+        "streamlit.runtime.state.session_state_proxy",
+    ):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def measure(func, setup=None, repeat=5):
+    """Time func() repeat times, calling setup() untimed before each run"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "repeat": repeat,
+    }
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of a list of numbers (share in 0..1)"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(share * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def compare(results, baseline, threshold, metric="min"):
+    """Return cases more than threshold times slower than the baseline.
+
+    For timing loops the best-of-n (min) time is compared, as it is the least
+    sensitive to noise.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or before.get("size") != result["size"]:
+            continue  # new case, or not comparable
+        ratio = result[metric] / before[metric] if before[metric] else 1.0
+        if ratio > threshold:
+            regressions.append((name, before[metric], result[metric], ratio))
+    return regressions
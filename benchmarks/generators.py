@@ -0,0 +1,108 @@
+"""
+Synthetic show generators for the benchmarks.
+
+Every generator returns a list of cue dicts in the app's format with consistent
+start/end times, so the result can be dropped straight into st.session_state.fireworks.
+All generators are deterministic for a given size and seed.
+"""
+
+import random
+
+
+def make_cue(i, start, parent=None, offset=0.0, rng=None):
+    rng = rng or random
+    fuse = round(rng.uniform(0.5, 3.0), 1)
+    explosion = round(rng.uniform(1.0, 8.0), 1)
+    return {
+        "id": f"cue{i:06d}",
+        "name": f"Cue {i}",
+        "start_time": start,
+        "fuse_duration": fuse,
+        "explosion_duration": explosion,
+        "end_time": start + fuse + explosion,
+        "dependent_on": parent["id"] if parent else None,
+        "dependency_offset": offset,
+        "cost": round(rng.uniform(5, 150), 2),
+    }
+
+
+def chain_show(size, seed=0):
+    """One long dependency chain: every cue starts after the previous one ends"""
+    rng = random.Random(seed)
+    fireworks = [make_cue(0, 0.0, rng=rng)]
+    for i in range(1, size):
+        parent = fireworks[-1]
+        offset = round(rng.uniform(-1.0, 2.0), 1)
+        fireworks.append(make_cue(i, parent["end_time"] + offset, parent, offset, rng))
+    return fireworks
+
+
+def fanout_show(size, roots=10, seed=0):
+    """A few root cues, each with a wide fan of cues depending directly on it"""
+    rng = random.Random(seed)
+    fireworks = [make_cue(i, i * 30.0, rng=rng) for i in range(min(roots, size))]
+    for i in range(len(fireworks), size):
+        parent = fireworks[i % roots]
+        offset = round(rng.uniform(0.0, 20.0), 1)
+        fireworks.append(make_cue(i, parent["end_time"] + offset, parent, offset, rng))
+    return fireworks
+
+
+def random_dag_show(size, dependent_share=0.7, seed=0):
+    """Random forest of dependencies: each cue may depend on any earlier cue"""
+    rng = random.Random(seed)
+    fireworks = []
+    for i in range(size):
+        if fireworks and rng.random() < dependent_share:
+            parent = fireworks[rng.randrange(len(fireworks))]
+            offset = round(rng.uniform(-1.0, 5.0), 1)
+            fireworks.append(
+                make_cue(i, parent["end_time"] + offset, parent, offset, rng)
+            )
+        else:
+            fireworks.append(make_cue(i, round(rng.uniform(0, 600), 1), rng=rng))
+    return fireworks
+
+
+def flat_show(size, duration=1800.0, seed=0):
+    """Independent cues spread over the show, no dependencies at all"""
+    rng = random.Random(seed)
+    return [
+        make_cue(i, round(rng.uniform(0, duration), 1), rng=rng) for i in range(size)
+    ]
+
+
+def catalog(size, seed=0):
+    """Firework product dicts in the format of Firework.to_dict"""
+    rng = random.Random(seed)
+    products = []
+    for i in range(size):
+        fuse = round(rng.uniform(0.5, 3.0), 1)
+        air = round(rng.uniform(0.5, 4.0), 1)
+        effect_time = round(rng.uniform(5, 600), 1)
+        products.append(
+            {
+                "id": f"prod{i:06d}",
+                "name": f"Product {i}",
+                "type": rng.choice(["shell", "cake", "candle", "fountain"]),
+                "fuse_duration": fuse,
+                "air_travel_time": air,
+                "effect_duration": round(rng.uniform(1, 10), 1),
+                "effect_time": effect_time,
+                "launch_time": effect_time - air - fuse,
+                "cost": round(rng.uniform(5, 150), 2),
+                "safety_radius": round(rng.uniform(5, 60), 1),
+                "rack": None,
+                "x": None,
+                "y": None,
+            }
+        )
+    return products
+
+
+SHAPES = {
+    "chain": chain_show,
+    "fanout": fanout_show,
+    "random_dag": random_dag_show,
+    "flat": flat_show,
+}
@@ -4,6 +4,8 @@ import streamlit as st
 import json
 import os
 
+import profiling
+
 # Initialize Firebase (only once)
 if not firebase_admin._apps:
     try:
@@ -32,6 +34,7 @@ if not firebase_admin._apps:
 db = firestore.client()
 
 
+@profiling.timed("firebase.save_show_to_firebase")
 def save_show_to_firebase(show_name, fireworks_data, user_id="anonymous"):
     """Save firework show to Firebase"""
     try:
@@ -51,6 +54,7 @@ def save_show_to_firebase(show_name, fireworks_data, user_id="anonymous"):
         return None
 
 
+@profiling.timed("firebase.get_user_shows")
 def get_user_shows(user_id="anonymous"):
     """Get all shows for a user"""
     try:
@@ -69,6 +73,7 @@ def get_user_shows(user_id="anonymous"):
         return []
 
 
+@profiling.timed("firebase.load_show_from_firebase")
 def load_show_from_firebase(show_id):
     """Load firework show from Firebase"""
     try:
@@ -80,3 +85,72 @@ def load_show_from_firebase(show_id):
     except Exception as e:
         st.error(f"Error loading from Firebase: {e}")
         return None
+
+
+# Firestore allows at most 500 writes per batch
+BATCH_LIMIT = 500
+
+
+@profiling.timed("firebase.save_cue_changes")
+def save_cue_changes(show_id, upserts, deletes, client_id):
+    """Write changed cues to the show's cue subcollection in batches"""
+    try:
+        cues_ref = db.collection("shows").document(show_id).collection("cues")
+        writes = [("set", fw) for fw in upserts] + [
+            ("delete", fw_id) for fw_id in deletes
+        ]
+        for start in range(0, len(writes), BATCH_LIMIT):
+            batch = db.batch()
+            for op, item in writes[start : start + BATCH_LIMIT]:
+                if op == "set":
+                    batch.set(
+                        cues_ref.document(item["id"]),
+                        {
+                            **item,
+                            "client_id": client_id,
+                            "updated_at": firestore.SERVER_TIMESTAMP,
+                        },
+                    )
+                else:
+                    batch.delete(cues_ref.document(item))
+            batch.commit()
+        return True
+    except Exception as e:
+        st.error(f"Error saving changes to Firebase: {e}")
+        return False
+
+
+@profiling.timed("firebase.subscribe_to_show_cues")
+def subscribe_to_show_cues(show_id, on_changes):
+    """Listen to per-cue changes of a show.
+
+    on_changes(upserts, deletes) is called from Firestore's listener thread with the
+    changed cue dicts and the ids of deleted cues. Returns the listener handle.
+    """
+
+    def on_snapshot(doc_snapshots, changes, read_time):
+        upserts, deletes = [], []
+        for change in changes:
+            if change.type.name == "REMOVED":
+                deletes.append(change.document.id)
+            else:
+                upserts.append(change.document.to_dict())
+        if upserts or deletes:
+            on_changes(upserts, deletes)
+
+    cues_ref = db.collection("shows").document(show_id).collection("cues")
+    return cues_ref.on_snapshot(on_snapshot)
+
+
+class FirestoreCueFeed:
+    """Change feed over the cue subcollection of a show, for live_sync.ShowSync"""
+
+    def __init__(self, show_id):
+        self.show_id = show_id
+
+    def subscribe(self, on_changes):
+        watch = subscribe_to_show_cues(self.show_id, on_changes)
+        return watch.unsubscribe
+
+    def write(self, upserts, deletes, client_id):
+        return save_cue_changes(self.show_id, upserts, deletes, client_id)
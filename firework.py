@@ -19,6 +19,10 @@ class Firework:
         effect_time,
         effect_duration,
         cost=0,
+        safety_radius=0,
+        rack=None,
+        x=None,
+        y=None,
     ):
         self.id = id
         self.name = name
@@ -29,6 +33,11 @@ class Firework:
         self.effect_time = effect_time
         self.launch_time = effect_time - air_travel_time - fuse_duration
         self.cost = cost
+        # Fallout radius in meters, and where the product is placed on the site map
+        self.safety_radius = safety_radius
+        self.rack = rack
+        self.x = x
+        self.y = y
 
     def from_dict(data):
         # Create a Firework instance from a dictionary
@@ -43,6 +52,10 @@ class Firework:
             effect_time=data["effect_time"],
             effect_duration=data["effect_duration"],
             cost=data.get("cost", 0),
+            safety_radius=data.get("safety_radius", 0),
+            rack=data.get("rack"),
+            x=data.get("x"),
+            y=data.get("y"),
         )
 
     def change_property(self, property_name, value):
@@ -69,6 +82,10 @@ class Firework:
             and self.effect_time == other.effect_time
             and self.effect_duration == other.effect_duration
             and self.cost == other.cost
+            and self.safety_radius == other.safety_radius
+            and self.rack == other.rack
+            and self.x == other.x
+            and self.y == other.y
         )
 
     def to_dict(self):
@@ -0,0 +1,143 @@
+"""
+This module defines the ShowHistory class, which provides undo/redo for a show.
+Instead of copying the whole show per step, each step stores only the cues that changed
+(old and new dict), so consecutive versions share every untouched cue dict.
+This relies on cue dicts being replaced, never mutated, when edited.
+
+Memory is O(changed cues) per step, but time is O(n): commit() scans the whole show
+for replaced dicts, and undo/redo rebuild the show list.
+"""
+
+from collections import deque
+
+
+class ShowHistory:
+    def __init__(self, fireworks=(), max_steps=200, max_changes=100_000):
+        self.max_steps = max_steps
+        self.max_changes = max_changes  # bound on cue versions held across all steps
+        self._undo = deque()
+        self._redo = []
+        self._stored_changes = 0
+        self._reset(fireworks)
+
+    def _reset(self, fireworks):
+        self._refs = {fw["id"]: fw for fw in fireworks}
+        self._ids = [fw["id"] for fw in fireworks]
+
+    def commit(self, fireworks, label="Edit"):
+        """Record the changes since the last commit as one undo step"""
+        changes = []
+        current_ids = []
+        for position, fw in enumerate(fireworks):
+            fw_id = fw["id"]
+            current_ids.append(fw_id)
+            old = self._refs.get(fw_id)
+            if old is not fw:
+                changes.append((fw_id, old, fw, position))
+        # Only look for removed cues when the id set can have changed
+        if len(current_ids) != len(self._refs) or any(c[1] is None for c in changes):
+            current = set(current_ids)
+            for position, fw_id in enumerate(self._ids):
+                if fw_id not in current:
+                    changes.append((fw_id, self._refs[fw_id], None, position))
+        if not changes:
+            return False
+
+        for _, redo_changes in self._redo:
+            self._stored_changes -= len(redo_changes)
+        self._redo.clear()
+        self._undo.append((label, changes))
+        self._stored_changes += len(changes)
+        self._trim()
+
+        for fw_id, _, new, _ in changes:
+            if new is None:
+                del self._refs[fw_id]
+            else:
+                self._refs[fw_id] = new
+        self._ids = current_ids
+        return True
+
+    def rebase(self, fireworks):
+        """Take the show as the new baseline without recording a step.
+
+        For changes made by someone else (a collaborator's edits): they cannot be
+        undone from here and leave the redo stack intact.
+        """
+        self._reset(fireworks)
+
+    def clear(self, fireworks=()):
+        """Forget all steps and start over from the given show"""
+        self._undo.clear()
+        self._redo.clear()
+        self._stored_changes = 0
+        self._reset(fireworks)
+
+    def _trim(self):
+        # Drop the oldest steps once either bound is exceeded, but keep the newest
+        while len(self._undo) > 1 and (
+            len(self._undo) > self.max_steps or self._stored_changes > self.max_changes
+        ):
+            self._stored_changes -= len(self._undo.popleft()[1])
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    @property
+    def undo_label(self):
+        return self._undo[-1][0] if self._undo else None
+
+    @property
+    def redo_label(self):
+        return self._redo[-1][0] if self._redo else None
+
+    def undo(self, fireworks):
+        """Return the show as it was before the last step (None if nothing to undo)"""
+        self.commit(fireworks)
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        restored = _apply(fireworks, step[1], forward=False)
+        self._redo.append(step)
+        self._reset(restored)
+        return restored
+
+    def redo(self, fireworks):
+        """Return the show with the last undone step re-applied (None if none)"""
+        # Uncommitted edits become a new step, which invalidates the redo stack
+        self.commit(fireworks)
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        restored = _apply(fireworks, step[1], forward=True)
+        self._undo.append(step)
+        self._trim()
+        self._reset(restored)
+        return restored
+
+    def __len__(self):
+        return len(self._undo)
+
+
+def _apply(fireworks, changes, forward):
+    """Rebuild the show list with each change applied forwards or backwards"""
+    target = {}
+    inserts = []
+    for fw_id, old, new, position in changes:
+        before, after = (old, new) if forward else (new, old)
+        target[fw_id] = after
+        if before is None and after is not None:
+            inserts.append((position, after))
+    result = [
+        target[fw["id"]] if fw["id"] in target else fw
+        for fw in fireworks
+        if target.get(fw["id"], fw) is not None
+    ]
+    for position, fw in sorted(inserts, key=lambda item: item[0]):
+        result.insert(position, fw)
+    return result
@@ -0,0 +1,177 @@
+"""
+This module keeps a local show in sync with collaborators through a per-cue change feed.
+Only changed cues travel in either direction: remote deltas are queued as they arrive
+and applied on the next rerun, and local edits are coalesced per cue and sent in
+debounced batches.
+
+A feed is any object with
+    subscribe(on_changes) -> unsubscribe callable, where on_changes(upserts, deletes)
+        receives cue dicts and deleted cue ids (possibly on another thread)
+    write(upserts, deletes, client_id) -> True on success; failed writes are retried
+firebase_config.FirestoreCueFeed is the Firestore implementation; InMemoryCueFeed is an
+in-process fake for tests and local experiments.
+"""
+
+import threading
+import time
+import uuid
+
+# Bookkeeping fields a feed adds to cue documents
+META_FIELDS = ("client_id", "updated_at")
+
+
+class ShowSync:
+    def __init__(self, feed, client_id=None, debounce=0.5, clock=time.monotonic):
+        self.client_id = client_id or uuid.uuid4().hex[:8]
+        self.debounce = debounce
+        self._feed = feed
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._incoming = {}  # cue id -> remote cue dict, or None if deleted
+        self._outgoing = {}  # cue id -> local cue dict, or None if deleted
+        self._last_edit = None
+        self._shadow = {}  # cue id -> cue dict as last exchanged with the feed
+        self._unsubscribe = feed.subscribe(self._on_remote_changes)
+
+    def close(self):
+        """Stop listening to the feed"""
+        self._unsubscribe()
+
+    def _on_remote_changes(self, upserts, deletes):
+        # Runs on the feed's thread: only queue, never touch the show here
+        with self._lock:
+            for fw in upserts:
+                if fw.get("client_id") == self.client_id:
+                    continue  # echo of our own write
+                self._incoming[fw["id"]] = {
+                    key: value for key, value in fw.items() if key not in META_FIELDS
+                }
+            for fw_id in deletes:
+                self._incoming[fw_id] = None
+
+    @property
+    def has_incoming(self):
+        return bool(self._incoming)
+
+    @property
+    def has_outgoing(self):
+        return bool(self._outgoing)
+
+    def apply_incoming(self, fireworks):
+        """Return the show with queued remote changes applied (None if none apply)"""
+        with self._lock:
+            incoming, self._incoming = self._incoming, {}
+        # A pending local edit of the same cue wins; it is about to be sent
+        incoming = {
+            fw_id: fw for fw_id, fw in incoming.items() if fw_id not in self._outgoing
+        }
+        if not incoming:
+            return None
+
+        result = []
+        changed = False
+        for fw in fireworks:
+            remote = incoming.pop(fw["id"], fw)
+            if remote is None:
+                self._shadow.pop(fw["id"], None)
+                changed = True
+                continue
+            if remote is not fw and remote != fw:
+                # Record as exchanged so it is not sent back as a local edit
+                self._shadow[fw["id"]] = remote
+                result.append(remote)
+                changed = True
+            else:
+                result.append(fw)
+        for fw_id, remote in incoming.items():
+            if remote is not None:
+                self._shadow[fw_id] = remote
+                result.append(remote)
+                changed = True
+        return result if changed else None
+
+    def collect_local_changes(self, fireworks):
+        """Queue cues edited locally since the last call; returns how many changed"""
+        seen = set()
+        changed = 0
+        for fw in fireworks:
+            seen.add(fw["id"])
+            if self._shadow.get(fw["id"]) is not fw:
+                self._shadow[fw["id"]] = fw
+                self._outgoing[fw["id"]] = fw
+                changed += 1
+        if len(seen) != len(self._shadow):
+            for fw_id in [fw_id for fw_id in self._shadow if fw_id not in seen]:
+                del self._shadow[fw_id]
+                self._outgoing[fw_id] = None
+                changed += 1
+        if changed:
+            self._last_edit = self._clock()
+        return changed
+
+    def flush(self, force=False):
+        """Send queued local edits once the debounce interval has passed.
+
+        Returns how many cues were sent. If the write fails the edits stay queued
+        (behind any newer edit of the same cue) and go out with the next flush.
+        """
+        if not self._outgoing:
+            return 0
+        if not force and self._clock() - self._last_edit < self.debounce:
+            return 0
+        outgoing, self._outgoing = self._outgoing, {}
+        upserts = [fw for fw in outgoing.values() if fw is not None]
+        deletes = [fw_id for fw_id, fw in outgoing.items() if fw is None]
+        sent = False
+        try:
+            sent = self._feed.write(upserts, deletes, self.client_id)
+        finally:
+            if not sent:
+                self._outgoing = {**outgoing, **self._outgoing}
+        return len(outgoing) if sent else 0
+
+
+class InMemoryCueFeed:
+    """In-process stand-in for a Firestore cue subcollection with snapshot listeners"""
+
+    def __init__(self, fireworks=()):
+        self._lock = threading.Lock()
+        self._cues = {fw["id"]: dict(fw) for fw in fireworks}
+        self._listeners = []
+        self.writes = 0  # number of write batches, for tests and benchmarks
+        self.cues_written = 0
+        self.fail_writes = 0  # reject this many upcoming writes, to simulate outages
+
+    def subscribe(self, on_changes):
+        with self._lock:
+            self._listeners.append(on_changes)
+            initial = list(self._cues.values())
+        # Like Firestore, the first snapshot delivers every existing cue
+        if initial:
+            on_changes(initial, [])
+        return lambda: self._listeners.remove(on_changes)
+
+    def write(self, upserts, deletes, client_id):
+        with self._lock:
+            if self.fail_writes:
+                self.fail_writes -= 1
+                return False
+            stored = [{**fw, "client_id": client_id} for fw in upserts]
+            for fw in stored:
+                self._cues[fw["id"]] = fw
+            for fw_id in deletes:
+                self._cues.pop(fw_id, None)
+            listeners = list(self._listeners)
+            self.writes += 1
+            self.cues_written += len(upserts) + len(deletes)
+        for on_changes in listeners:
+            on_changes(stored, list(deletes))
+        return True
+
+    def snapshot(self):
+        """Current cues in the feed, without bookkeeping fields"""
+        with self._lock:
+            return {
+                fw_id: {k: v for k, v in fw.items() if k not in META_FIELDS}
+                for fw_id, fw in self._cues.items()
+            }
@@ -0,0 +1,92 @@
+"""
+This module handles pattern cues: chases, fans and sweeps stored as a single base cue
+plus a count, a stagger between items and optional per-item offsets.
+A pattern stays one dict (and one node for dependencies) in the show; its individual
+items are only generated, lazily, where they are needed (rendering, export, indexing).
+
+Pattern keys on a cue dict:
+    pattern_count    number of items (a cue without it is a plain single cue)
+    pattern_stagger  seconds between consecutive items
+    pattern_offsets  optional list of extra per-item offsets in seconds
+"""
+
+# Site placement of a cue (see safety.py); every item fires from the same spot
+PLACEMENT_FIELDS = ("rack", "x", "y", "safety_radius")
+
+
+def is_pattern(fw):
+    """Check if a cue is a pattern of several items"""
+    return fw.get("pattern_count", 1) > 1
+
+
+def item_offsets(fw):
+    """Yield the start offset of each pattern item relative to the base cue"""
+    count = fw.get("pattern_count", 1)
+    stagger = fw.get("pattern_stagger", 0)
+    offsets = fw.get("pattern_offsets") or []
+    for i in range(count):
+        yield i * stagger + (offsets[i] if i < len(offsets) else 0)
+
+
+def pattern_tail(fw):
+    """Latest item start relative to the base cue (0 for plain cues)"""
+    if not is_pattern(fw):
+        return 0
+    return max(item_offsets(fw))
+
+
+def expand_cue(fw):
+    """Yield the individual cues of a pattern (or the cue itself if it is plain).
+
+    Items depend on the pattern's own dependency, shifted by their offset, share
+    its placement and carry the pattern's id as pattern_id.
+    """
+    if not is_pattern(fw):
+        yield fw
+        return
+    for i, offset in enumerate(item_offsets(fw)):
+        start = fw["start_time"] + offset
+        yield {
+            "id": f"{fw['id']}-{i + 1}",
+            "name": f"{fw['name']} #{i + 1}",
+            "start_time": start,
+            "fuse_duration": fw["fuse_duration"],
+            "explosion_duration": fw["explosion_duration"],
+            "end_time": start + fw["fuse_duration"] + fw["explosion_duration"],
+            "dependent_on": fw["dependent_on"],
+            "dependency_offset": fw["dependency_offset"] + offset,
+            "cost": fw.get("cost", 0),
+            "pattern_id": fw["id"],
+            **{field: fw[field] for field in PLACEMENT_FIELDS if field in fw},
+        }
+
+
+def expand_fireworks(fireworks):
+    """Yield every individual cue of a show, expanding patterns into items.
+
+    Cues that depend on a pattern are re-pointed at its last item to end, so the
+    flat list schedules exactly like the compact one. Items lose their pattern_id,
+    which would name a cue that no longer exists.
+    """
+    last_items = {
+        fw["id"]: f"{fw['id']}-{_last_item_index(fw) + 1}"
+        for fw in fireworks
+        if is_pattern(fw)
+    }
+    for fw in fireworks:
+        for item in expand_cue(fw):
+            if item is not fw:
+                del item["pattern_id"]  # a fresh dict per item
+            if item["dependent_on"] in last_items:
+                item = {**item, "dependent_on": last_items[item["dependent_on"]]}
+            yield item
+
+
+def _last_item_index(fw):
+    offsets = list(item_offsets(fw))
+    return offsets.index(max(offsets))
+
+
+def parse_offsets(text):
+    """Parse a comma separated list of per-item offsets ("" means none)"""
+    return [float(part) for part in text.split(",") if part.strip()]
@@ -0,0 +1,131 @@
+"""
+This module is a lightweight instrumentation layer for the planner's hot paths.
+Functions are wrapped with @timed(name), code blocks with `with timer(name)`, and
+loops report work with count(name, n). Everything is recorded per rerun and only when
+profiling was enabled for that rerun; when disabled each hook is a flag check.
+
+Streamlit runs every script rerun on its own thread, so the recorder is thread-local
+and concurrent sessions never mix their numbers.
+"""
+
+import cProfile
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+
+_local = threading.local()
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def _recorder():
+    return getattr(_local, "recorder", None)
+
+
+def start_rerun(enabled, profile=False):
+    """Start recording a rerun (and a cProfile session if profile is set)"""
+    if not enabled:
+        _local.recorder = None
+        return
+    _local.recorder = {
+        "started": time.perf_counter(),
+        "timings": {},  # name -> [calls, total seconds]
+        "counters": {},
+        "profiler": cProfile.Profile() if profile else None,
+    }
+    if profile:
+        _local.recorder["profiler"].enable()
+
+
+def finish_rerun():
+    """Stop recording; returns (report dict, cProfile.Profile or None)"""
+    recorder = _recorder()
+    _local.recorder = None
+    if recorder is None:
+        return None, None
+    profiler = recorder["profiler"]
+    if profiler:
+        profiler.disable()
+    report = {
+        "rerun_seconds": time.perf_counter() - recorder["started"],
+        "timings": {
+            name: {"calls": calls, "seconds": total}
+            for name, (calls, total) in sorted(
+                recorder["timings"].items(), key=lambda item: -item[1][1]
+            )
+        },
+        "counters": dict(recorder["counters"]),
+    }
+    return report, profiler
+
+
+def _record(recorder, name, seconds):
+    entry = recorder["timings"].setdefault(name, [0, 0.0])
+    entry[0] += 1
+    entry[1] += seconds
+
+
+class _Timer:
+    __slots__ = ("recorder", "name", "started")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        _record(self.recorder, self.name, time.perf_counter() - self.started)
+
+
+def timer(name):
+    """Context manager timing a block (a shared no-op when profiling is off)"""
+    recorder = _recorder()
+    return _Timer(recorder, name) if recorder is not None else _NULL_TIMER
+
+
+def timed(name):
+    """Decorator timing every call of a function"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder()
+            if recorder is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(recorder, name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, n=1):
+    """Add n to a counter"""
+    recorder = _recorder()
+    if recorder is not None:
+        recorder["counters"][name] = recorder["counters"].get(name, 0) + n
+
+
+def write_log(report, directory):
+    """Append a rerun report as one JSON line to reruns.jsonl in directory"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "reruns.jsonl"), "a") as f:
+        f.write(json.dumps({"time": time.time(), **report}) + "\n")
+
+
+def dump_profile(profiler, directory):
+    """Write cProfile stats of a rerun to a timestamped .prof file in directory"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(directory, f"rerun-{stamp}.prof")
+    profiler.dump_stats(path)
+    return path
@@ -0,0 +1,207 @@
+"""
+This module checks a show for spatio-temporal safety conflicts.
+A cue placed on the site map (x/y in meters) has a fallout zone: a circle of its
+safety_radius around its position, live from ignition of the effect until it ends.
+Two cues conflict when their fallout zones overlap while both are live, and a cue
+conflicts with an audience zone (a rectangle) when its fallout zone reaches into it.
+
+Candidates are found through a spatial grid hash, so each cue is only compared with
+cues in the grid cells its fallout zone covers instead of with every other cue.
+find_conflicts checks a whole show with a time sweep over the grid; SafetyChecker
+keeps the grid between reruns and re-checks only the cues that changed.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+
+DEFAULT_CELL_SIZE = 25.0  # meters
+
+
+def is_placed(fw):
+    """Check if a cue has a position on the site map"""
+    return fw.get("x") is not None and fw.get("y") is not None
+
+
+def hazard_interval(fw):
+    """Time during which a cue's fallout zone is live: from the burst to the end"""
+    return fw["start_time"] + fw["fuse_duration"], fw["end_time"]
+
+
+def _cells(fw, cell_size):
+    radius = fw.get("safety_radius", 0)
+    x0 = math.floor((fw["x"] - radius) / cell_size)
+    x1 = math.floor((fw["x"] + radius) / cell_size)
+    y0 = math.floor((fw["y"] - radius) / cell_size)
+    y1 = math.floor((fw["y"] + radius) / cell_size)
+    return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+
+def _zones_overlap(a, b):
+    reach = a.get("safety_radius", 0) + b.get("safety_radius", 0)
+    return math.hypot(a["x"] - b["x"], a["y"] - b["y"]) < reach
+
+
+def _times_overlap(a, b):
+    a0, a1 = hazard_interval(a)
+    b0, b1 = hazard_interval(b)
+    return a0 < b1 and b0 < a1
+
+
+def _pair_conflict(a, b):
+    first, second = sorted((a, b), key=lambda fw: fw["id"])
+    return {
+        "kind": "cues",
+        "ids": (first["id"], second["id"]),
+        "names": (first["name"], second["name"]),
+        "distance": math.hypot(a["x"] - b["x"], a["y"] - b["y"]),
+        "start": max(hazard_interval(a)[0], hazard_interval(b)[0]),
+    }
+
+
+def audience_conflicts(fw, zones):
+    """Audience zones (x0, y0, x1, y1 rectangles) reached by a cue's fallout zone"""
+    hits = []
+    radius = fw.get("safety_radius", 0)
+    for zone in zones:
+        # Distance from the cue to the nearest point of the rectangle
+        dx = max(zone["x0"] - fw["x"], 0, fw["x"] - zone["x1"])
+        dy = max(zone["y0"] - fw["y"], 0, fw["y"] - zone["y1"])
+        if math.hypot(dx, dy) < radius:
+            hits.append(
+                {
+                    "kind": "audience",
+                    "ids": (fw["id"],),
+                    "names": (fw["name"], zone.get("name", "Audience")),
+                    "distance": math.hypot(dx, dy),
+                    "start": hazard_interval(fw)[0],
+                }
+            )
+    return hits
+
+
+def find_conflicts(fireworks, zones=(), cell_size=DEFAULT_CELL_SIZE):
+    """Find all conflicts in a show with a time sweep over a spatial grid hash"""
+    placed = sorted(
+        (fw for fw in fireworks if is_placed(fw)), key=lambda fw: hazard_interval(fw)
+    )
+    grid = defaultdict(set)
+    live = {}  # cue id -> cue, for cues whose fallout zone is live
+    ending = []  # heap of (end time, cue id)
+    conflicts = []
+    for fw in placed:
+        start, end = hazard_interval(fw)
+        while ending and ending[0][0] <= start:
+            _, done_id = heapq.heappop(ending)
+            for cell in _cells(live[done_id], cell_size):
+                grid[cell].discard(done_id)
+            del live[done_id]
+
+        cells = _cells(fw, cell_size)
+        candidates = set()
+        for cell in cells:
+            candidates |= grid[cell]
+        for other_id in candidates:
+            if _zones_overlap(fw, live[other_id]):
+                conflicts.append(_pair_conflict(fw, live[other_id]))
+        conflicts.extend(audience_conflicts(fw, zones))
+
+        if end > start:
+            live[fw["id"]] = fw
+            heapq.heappush(ending, (end, fw["id"]))
+            for cell in cells:
+                grid[cell].add(fw["id"])
+    return sorted(conflicts, key=lambda c: c["start"])
+
+
+class SafetyChecker:
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self._zones = []
+        self._refs = {}  # cue id -> placed cue dict as last checked
+        self._grid = defaultdict(set)  # cell -> ids of placed cues covering it
+        self._pairs = defaultdict(dict)  # cue id -> {other id: conflict}
+        self._audience = {}  # cue id -> audience conflicts
+
+    def sync(self, fireworks, zones=()):
+        """Re-check only cues that were added, replaced or removed since last sync"""
+        zones = list(zones)
+        if zones != self._zones:
+            # New audience zones: rebuild from scratch with the sweep
+            self._zones = zones
+            self._rebuild(fireworks)
+            return True
+
+        changed = []
+        seen = set()
+        for fw in fireworks:
+            seen.add(fw["id"])
+            if self._refs.get(fw["id"]) is not fw and (
+                is_placed(fw) or fw["id"] in self._refs
+            ):
+                changed.append(fw)
+        removed = [fw_id for fw_id in self._refs if fw_id not in seen]
+        for fw_id in removed:
+            self._remove(fw_id)
+        for fw in changed:
+            self._remove(fw["id"])
+            if is_placed(fw):
+                self._add(fw)
+        return bool(changed or removed)
+
+    def _rebuild(self, fireworks):
+        self._refs.clear()
+        self._grid.clear()
+        self._pairs.clear()
+        self._audience.clear()
+        for fw in fireworks:
+            if is_placed(fw):
+                self._register(fw)
+        for conflict in find_conflicts(fireworks, self._zones, self.cell_size):
+            if conflict["kind"] == "audience":
+                self._audience.setdefault(conflict["ids"][0], []).append(conflict)
+            else:
+                a, b = conflict["ids"]
+                self._pairs[a][b] = self._pairs[b][a] = conflict
+
+    def _register(self, fw):
+        self._refs[fw["id"]] = fw
+        for cell in _cells(fw, self.cell_size):
+            self._grid[cell].add(fw["id"])
+
+    def _add(self, fw):
+        candidates = set()
+        for cell in _cells(fw, self.cell_size):
+            candidates |= self._grid[cell]
+        for other_id in candidates:
+            other = self._refs[other_id]
+            if _times_overlap(fw, other) and _zones_overlap(fw, other):
+                conflict = _pair_conflict(fw, other)
+                self._pairs[fw["id"]][other_id] = conflict
+                self._pairs[other_id][fw["id"]] = conflict
+        hits = audience_conflicts(fw, self._zones)
+        if hits:
+            self._audience[fw["id"]] = hits
+        self._register(fw)
+
+    def _remove(self, fw_id):
+        fw = self._refs.pop(fw_id, None)
+        if fw is None:
+            return
+        for cell in _cells(fw, self.cell_size):
+            self._grid[cell].discard(fw_id)
+        for other_id in self._pairs.pop(fw_id, {}):
+            self._pairs[other_id].pop(fw_id, None)
+        self._audience.pop(fw_id, None)
+
+    def conflicts(self):
+        """All current conflicts, earliest first"""
+        pairs = {
+            conflict["ids"]: conflict
+            for others in self._pairs.values()
+            for conflict in others.values()
+        }
+        found = list(pairs.values()) + [
+            hit for hits in self._audience.values() for hit in hits
+        ]
+        return sorted(found, key=lambda c: c["start"])
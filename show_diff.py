@@ -0,0 +1,114 @@
+"""
+This module compares versions of a show, keyed by cue id.
+diff_shows reports added, removed, retimed, re-parented and otherwise modified cues in
+a single pass over each version, and three_way_merge combines two edited copies of a
+common base version field by field, reporting the edits that conflict.
+"""
+
+TIMING_FIELDS = ("start_time", "end_time")
+
+
+def diff_shows(old, new):
+    """Compare two versions of a show and group the cue ids by kind of change"""
+    old_by_id = {fw["id"]: fw for fw in old}
+    diff = {"added": [], "removed": [], "retimed": [], "reparented": [], "modified": []}
+    seen = set()
+    for fw in new:
+        fw_id = fw["id"]
+        seen.add(fw_id)
+        before = old_by_id.get(fw_id)
+        if before is None:
+            diff["added"].append(fw_id)
+        elif before is not fw and before != fw:
+            if any(before.get(f) != fw.get(f) for f in TIMING_FIELDS):
+                diff["retimed"].append(fw_id)
+            if before.get("dependent_on") != fw.get("dependent_on"):
+                diff["reparented"].append(fw_id)
+            if any(
+                before.get(f) != fw.get(f)
+                for f in before.keys() | fw.keys()
+                if f not in TIMING_FIELDS and f != "dependent_on"
+            ):
+                diff["modified"].append(fw_id)
+    diff["removed"] = [fw["id"] for fw in old if fw["id"] not in seen]
+    return diff
+
+
+def is_empty(diff):
+    """Check if a diff has no changes"""
+    return not any(diff.values())
+
+
+def three_way_merge(base, ours, theirs):
+    """Merge two edited copies of a base show.
+
+    Returns (merged, conflicts). Edits made on one side only are taken as-is; fields
+    edited differently on both sides keep our value and are reported as conflicts.
+    """
+    base_by_id = {fw["id"]: fw for fw in base}
+    ours_by_id = {fw["id"]: fw for fw in ours}
+    theirs_by_id = {fw["id"]: fw for fw in theirs}
+    merged = []
+    conflicts = []
+
+    # Keep our order, then cues only they added, then cues only the base had
+    ordered_ids = dict.fromkeys(
+        [fw["id"] for fw in ours]
+        + [fw["id"] for fw in theirs]
+        + [fw["id"] for fw in base]
+    )
+    for fw_id in ordered_ids:
+        fw = _merge_cue(
+            fw_id,
+            base_by_id.get(fw_id),
+            ours_by_id.get(fw_id),
+            theirs_by_id.get(fw_id),
+            conflicts,
+        )
+        if fw is not None:
+            merged.append(fw)
+
+    # A cue may now depend on one that the other side deleted
+    merged_ids = {fw["id"] for fw in merged}
+    for i, fw in enumerate(merged):
+        if fw.get("dependent_on") and fw["dependent_on"] not in merged_ids:
+            conflicts.append(
+                _conflict(
+                    fw["id"], "dependent_on", "missing parent", fw["dependent_on"], None
+                )
+            )
+            merged[i] = {**fw, "dependent_on": None, "dependency_offset": 0}
+    return merged, conflicts
+
+
+def _merge_cue(fw_id, base, ours, theirs, conflicts):
+    if ours == theirs:
+        return ours
+    if ours == base:
+        return theirs
+    if theirs == base:
+        return ours
+    if ours is None or theirs is None:
+        # Deleted on one side, edited on the other: keep the edited cue
+        conflicts.append(_conflict(fw_id, None, "edited and deleted", ours, theirs))
+        return ours if ours is not None else theirs
+
+    merged = {}
+    base = base or {}
+    # Times of dependent cues are recomputed from their parent after merging
+    derived = ours.get("dependent_on") is not None
+    for field in list(ours) + [f for f in theirs if f not in ours]:
+        mine, other, original = ours.get(field), theirs.get(field), base.get(field)
+        if mine == other or other == original:
+            merged[field] = mine
+        elif mine == original:
+            merged[field] = other
+        else:
+            merged[field] = mine
+            if not (derived and field in TIMING_FIELDS):
+                conflicts.append(_conflict(fw_id, field, "both edited", mine, other))
+    return merged
+
+
+def _conflict(fw_id, field, kind, ours, theirs):
+    return {"id": fw_id, "field": field, "kind": kind, "ours": ours, "theirs": theirs}
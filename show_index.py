@@ -0,0 +1,225 @@
+"""
+This module defines the ShowIndex class, a time-sorted index over the cues of a show.
+It keeps sorted launch and explosion times together with prefix sums of cost and
+explosion time, so spend and intensity questions can be answered with binary searches
+instead of re-scanning the fireworks list.
+
+Cue dicts are treated as immutable: any edit replaces the dict in the show list, so
+sync() only has to re-index the cues whose dict object changed.
+
+Queries are O(log n) between edits. Edits are O(n): an insertion shifts the sorted
+lists, and the prefix sums are rebuilt in full on the first query after a batch of
+edits.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate
+
+from patterns import item_offsets
+
+
+class ShowIndex:
+    def __init__(self, fireworks=()):
+        self.version = 0
+        self._refs = {}  # cue id -> cue dict as last indexed
+        self._entries = {}  # cue id -> list of indexed (start, burst, end, cost) items
+        self._launches = []  # sorted (start_time, cue id, cost)
+        self._burst_starts = []  # sorted explosion start times
+        self._burst_ends = []  # sorted explosion end (= cue end) times
+        self._spans = []  # sorted cue lengths, used to bound window lookups
+        self._dirty = True
+        self._cost_prefix = [0]
+        self._burst_start_prefix = [0]
+        self._burst_end_prefix = [0]
+        self.sync(fireworks)
+
+    # ------------------------------------------------------------------ edits
+
+    def sync(self, fireworks):
+        """Re-index only the cues that were added, replaced or removed"""
+        seen = set()
+        changed = []
+        for fw in fireworks:
+            seen.add(fw["id"])
+            if self._refs.get(fw["id"]) is not fw:
+                changed.append(fw)
+        removed = [fw_id for fw_id in self._refs if fw_id not in seen]
+        if len(changed) + len(removed) > max(_BULK_THRESHOLD, len(self._refs) // 4):
+            # Sorting everything once beats many insertions (imports, loads)
+            self._rebuild(fireworks)
+            return True
+        for fw_id in removed:
+            self.remove(fw_id)
+        for fw in changed:
+            self.remove(fw["id"])
+            self.add(fw)
+        return bool(changed or removed)
+
+    def _rebuild(self, fireworks):
+        self._refs = {fw["id"]: fw for fw in fireworks}
+        self._entries = {fw["id"]: list(self._cue_entries(fw)) for fw in fireworks}
+        items = [
+            (fw_id, entry)
+            for fw_id, entries in self._entries.items()
+            for entry in entries
+        ]
+        self._launches = sorted((e[0], fw_id, e[3]) for fw_id, e in items)
+        self._burst_starts = sorted(e[1] for _, e in items)
+        self._burst_ends = sorted(e[2] for _, e in items)
+        self._spans = sorted(e[2] - e[0] for _, e in items)
+        self._touch()
+
+    def add(self, fw):
+        """Index a single cue"""
+        entries = list(self._cue_entries(fw))
+        for start, burst, end, cost in entries:
+            insort(self._launches, (start, fw["id"], cost))
+            insort(self._burst_starts, burst)
+            insort(self._burst_ends, end)
+            insort(self._spans, end - start)
+        self._refs[fw["id"]] = fw
+        self._entries[fw["id"]] = entries
+        self._touch()
+
+    def remove(self, fw_id):
+        """Drop a cue from the index (no-op if it is not indexed)"""
+        if fw_id not in self._refs:
+            return
+        for start, burst, end, cost in self._entries.pop(fw_id):
+            _remove_sorted(self._launches, (start, fw_id, cost))
+            _remove_sorted(self._burst_starts, burst)
+            _remove_sorted(self._burst_ends, end)
+            _remove_sorted(self._spans, end - start)
+        del self._refs[fw_id]
+        self._touch()
+
+    def _cue_entries(self, fw):
+        # Pattern cues are indexed item by item, plain cues as a single item
+        for offset in item_offsets(fw):
+            start = fw["start_time"] + offset
+            burst = start + fw["fuse_duration"]
+            yield start, burst, burst + fw["explosion_duration"], fw.get("cost", 0)
+
+    def _touch(self):
+        self.version += 1
+        self._dirty = True
+
+    def _prefixes(self):
+        # Rebuilt in O(n), at most once per batch of edits
+        if self._dirty:
+            self._cost_prefix = list(
+                accumulate((cost for _, _, cost in self._launches), initial=0)
+            )
+            self._burst_start_prefix = list(accumulate(self._burst_starts, initial=0))
+            self._burst_end_prefix = list(accumulate(self._burst_ends, initial=0))
+            self._dirty = False
+
+    # ---------------------------------------------------------------- queries
+
+    def cue(self, fw_id):
+        """Return the indexed cue dict for an id (None if unknown)"""
+        return self._refs.get(fw_id)
+
+    def __len__(self):
+        # Counts individual items, so a pattern contributes pattern_count
+        return len(self._launches)
+
+    @property
+    def total_cost(self):
+        self._prefixes()
+        return self._cost_prefix[-1]
+
+    @property
+    def end_time(self):
+        return self._burst_ends[-1] if self._burst_ends else 0
+
+    def cumulative_cost(self, t):
+        """Total cost of cues launched at or before t"""
+        self._prefixes()
+        return self._cost_prefix[bisect_right(self._launches, (t, _MAX_KEY))]
+
+    def launched_between(self, t0, t1):
+        """Number and cost of cues launched in [t0, t1]"""
+        self._prefixes()
+        lo = bisect_left(self._launches, (t0,))
+        hi = bisect_right(self._launches, (t1, _MAX_KEY))
+        hi = max(hi, lo)
+        return hi - lo, self._cost_prefix[hi] - self._cost_prefix[lo]
+
+    def active_count(self, t):
+        """Number of explosions in progress at time t"""
+        return bisect_right(self._burst_starts, t) - bisect_right(self._burst_ends, t)
+
+    def explosion_seconds(self, t0, t1):
+        """Total explosion time (summed over cues) falling inside [t0, t1]"""
+        if t1 <= t0:
+            return 0
+        return self._explosion_seconds_until(t1) - self._explosion_seconds_until(t0)
+
+    def _explosion_seconds_until(self, t):
+        self._prefixes()
+        started = bisect_right(self._burst_starts, t)
+        ended = bisect_right(self._burst_ends, t)
+        return (t * started - self._burst_start_prefix[started]) - (
+            t * ended - self._burst_end_prefix[ended]
+        )
+
+    def cues_between(self, t0, t1):
+        """Ids of cues whose fuse or explosion overlaps [t0, t1]"""
+        longest = self._spans[-1] if self._spans else 0
+        lo = bisect_left(self._launches, (t0 - longest,))
+        hi = bisect_right(self._launches, (t1, _MAX_KEY))
+        ids = []
+        for fw_id, entries in self._window_candidates(lo, hi):
+            if any(start <= t1 and end >= t0 for start, _, end, _ in entries):
+                ids.append(fw_id)
+        return ids
+
+    def _window_candidates(self, lo, hi):
+        seen = set()
+        for _, fw_id, _ in self._launches[lo:hi]:
+            if fw_id not in seen:
+                seen.add(fw_id)
+                yield fw_id, self._entries[fw_id]
+
+    def window_summary(self, t0, t1):
+        """Summarize what happens between t0 and t1"""
+        launches, cost = self.launched_between(t0, t1)
+        burst_seconds = self.explosion_seconds(t0, t1)
+        return {
+            "cues": self.cues_between(t0, t1),
+            "launches": launches,
+            "cost": cost,
+            "explosion_seconds": burst_seconds,
+            "average_intensity": burst_seconds / (t1 - t0) if t1 > t0 else 0,
+        }
+
+    def cost_curve(self, samples=200):
+        """Sampled cumulative spend curve as (times, costs)"""
+        times = self._sample_times(samples)
+        return times, [self.cumulative_cost(t) for t in times]
+
+    def intensity_curve(self, samples=200):
+        """Sampled active-explosion count as (times, counts)"""
+        times = self._sample_times(samples)
+        return times, [self.active_count(t) for t in times]
+
+    def _sample_times(self, samples):
+        end = self.end_time
+        if samples < 2 or end <= 0:
+            return [0, end]
+        step = end / (samples - 1)
+        return [i * step for i in range(samples)]
+
+
+# Above this many changed cues (or a quarter of the show) sync() rebuilds the index
+_BULK_THRESHOLD = 64
+
+# Sorts after any cue id, so (t, _MAX_KEY) bounds every launch at time t
+_MAX_KEY = "\U0010ffff"
+
+
+def _remove_sorted(items, value):
+    i = bisect_left(items, value)
+    if i < len(items) and items[i] == value:
+        del items[i]
@@ -0,0 +1,175 @@
+"""Undo/redo through ShowHistory's per-step deltas."""
+
+import random
+
+from history import ShowHistory
+
+
+def cue(fw_id, **fields):
+    return {"id": fw_id, "name": fw_id, "start_time": 0.0, **fields}
+
+
+def edit(show, position, **fields):
+    show = list(show)
+    show[position] = {**show[position], **fields}
+    return show
+
+
+def test_undo_and_redo_a_replaced_cue():
+    v0 = [cue("a"), cue("b"), cue("c")]
+    history = ShowHistory(v0)
+    v1 = edit(v0, 1, start_time=5.0)
+    assert history.commit(v1, "Retime b")
+    assert history.undo_label == "Retime b"
+
+    assert history.undo(v1) == v0
+    assert history.redo_label == "Retime b"
+    assert history.redo(v0) == v1
+
+
+def test_undo_reinserts_removed_cues_at_their_positions():
+    v0 = [cue(fw_id) for fw_id in "abcde"]
+    history = ShowHistory(v0)
+    v1 = [v0[0], v0[2], v0[4]]  # remove b and d
+    history.commit(v1, "Delete")
+
+    restored = history.undo(v1)
+    assert [fw["id"] for fw in restored] == list("abcde")
+    assert history.redo(restored) == v1
+
+
+def test_undo_drops_added_cues_and_redo_puts_them_back_in_place():
+    v0 = [cue("a"), cue("c")]
+    history = ShowHistory(v0)
+    v1 = [v0[0], cue("b"), v0[1], cue("d")]
+    history.commit(v1, "Add")
+
+    assert history.undo(v1) == v0
+    assert history.redo(v0) == v1
+
+
+def test_unchanged_cue_dicts_are_shared_between_versions():
+    v0 = [cue(f"c{i}") for i in range(100)]
+    history = ShowHistory(v0)
+    v1 = edit(v0, 50, cost=1.0)
+    history.commit(v1)
+    restored = history.undo(v1)
+    assert all(a is b for a, b in zip(restored, v0))
+
+
+def test_commit_without_changes_records_nothing():
+    v0 = [cue("a")]
+    history = ShowHistory(v0)
+    assert not history.commit(list(v0))
+    assert not history.can_undo
+
+
+def test_new_commit_clears_redo():
+    v0 = [cue("a")]
+    history = ShowHistory(v0)
+    v1 = edit(v0, 0, cost=1.0)
+    history.commit(v1)
+    history.undo(v1)
+    v2 = edit(v0, 0, cost=2.0)
+    history.commit(v2)
+    assert not history.can_redo
+
+
+def test_undo_commits_pending_edits_first():
+    v0 = [cue("a")]
+    history = ShowHistory(v0)
+    v1 = edit(v0, 0, cost=1.0)  # never committed
+    assert history.undo(v1) == v0
+    assert history.redo(v0) == v1
+
+
+def test_max_steps_drops_the_oldest_steps():
+    show = [cue("a")]
+    history = ShowHistory(show, max_steps=3)
+    for i in range(5):
+        show = edit(show, 0, cost=float(i))
+        history.commit(show, f"Step {i}")
+    assert len(history) == 3
+    for _ in range(3):
+        show = history.undo(show)
+    assert show[0]["cost"] == 1.0
+    assert history.undo(show) is None
+
+
+def test_max_changes_drops_old_steps_but_keeps_the_newest():
+    show = [cue(f"c{i}") for i in range(10)]
+    history = ShowHistory(show, max_changes=15)
+    show = [{**fw, "cost": 1.0} for fw in show]
+    history.commit(show, "Ten")
+    show = [{**fw, "cost": 2.0} for fw in show]
+    history.commit(show, "Ten more")
+    assert len(history) == 1
+    assert history.undo_label == "Ten more"
+
+    big = [{**fw, "cost": 3.0} for fw in show] + [cue(f"n{i}") for i in range(10)]
+    history.commit(big, "Twenty")
+    assert len(history) == 1  # a single step over the bound is still kept
+
+
+def test_random_edits_round_trip():
+    rng = random.Random(0)
+    show = [cue(f"c{i}") for i in range(30)]
+    history = ShowHistory(show)
+    versions = [show]
+    next_id = 30
+    for step in range(50):
+        show = list(show)
+        for _ in range(rng.randint(1, 4)):
+            action = rng.random()
+            if action < 0.4 and show:
+                position = rng.randrange(len(show))
+                show[position] = {**show[position], "cost": float(step)}
+            elif action < 0.7 and show:
+                del show[rng.randrange(len(show))]
+            else:
+                show.insert(rng.randint(0, len(show)), cue(f"c{next_id}"))
+                next_id += 1
+        history.commit(show, f"Step {step}")
+        versions.append(show)
+
+    for expected in reversed(versions[:-1]):
+        show = history.undo(show)
+        assert show == expected
+    for expected in versions[1:]:
+        show = history.redo(show)
+        assert show == expected
+
+
+def test_rebased_changes_are_not_undone():
+    v0 = [cue("a"), cue("b")]
+    history = ShowHistory(v0)
+    v1 = edit(v0, 0, cost=1.0)  # own edit
+    history.commit(v1, "Own edit")
+    v2 = edit(v1, 1, cost=9.0) + [cue("c")]  # collaborator's edits
+    history.rebase(v2)
+
+    undone = history.undo(v2)
+    assert undone == [v0[0], v2[1], v2[2]]
+    assert history.redo(undone) == v2
+
+
+def test_rebase_keeps_the_redo_stack():
+    v0 = [cue("a"), cue("b")]
+    history = ShowHistory(v0)
+    v1 = edit(v0, 0, cost=1.0)
+    history.commit(v1, "Own edit")
+    undone = history.undo(v1)
+    remote = edit(undone, 1, cost=9.0)
+    history.rebase(remote)
+
+    assert history.redo_label == "Own edit"
+    assert history.redo(remote) == [v1[0], remote[1]]
+
+
+def test_clear_forgets_all_steps():
+    v0 = [cue("a")]
+    history = ShowHistory(v0)
+    history.commit(edit(v0, 0, cost=1.0))
+    history.clear([])
+    assert not history.can_undo and not history.can_redo
+    assert not history.commit([])
@@ -0,0 +1,143 @@
+"""Two ShowSync clients exchanging edits through one InMemoryCueFeed."""
+
+import pytest
+
+from live_sync import InMemoryCueFeed, ShowSync
+
+DEBOUNCE = 0.5
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds=DEBOUNCE):
+        self.now += seconds
+
+
+def cue(fw_id, **fields):
+    return {"id": fw_id, "name": fw_id, "start_time": 0.0, **fields}
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def feed():
+    return InMemoryCueFeed()
+
+
+@pytest.fixture
+def clients(feed, clock):
+    a = ShowSync(feed, client_id="a", debounce=DEBOUNCE, clock=clock)
+    b = ShowSync(feed, client_id="b", debounce=DEBOUNCE, clock=clock)
+    yield a, b
+    a.close()
+    b.close()
+
+
+def send(sync, fireworks, clock):
+    sync.collect_local_changes(fireworks)
+    clock.advance()
+    return sync.flush()
+
+
+def test_edits_and_deletes_reach_the_other_client(clients, clock):
+    a, b = clients
+    show_a = [cue("c1"), cue("c2"), cue("c3")]
+    assert send(a, show_a, clock) == 3
+
+    show_b = b.apply_incoming([])
+    assert show_b == show_a
+
+    # b edits c1 (replacing the dict) and deletes c3
+    show_b = [{**show_b[0], "start_time": 5.0}, show_b[1]]
+    assert send(b, show_b, clock) == 2
+
+    show_a = a.apply_incoming(show_a)
+    assert show_a == [cue("c1", start_time=5.0), cue("c2")]
+
+
+def test_edits_are_debounced_and_coalesced(clients, feed, clock):
+    a, b = clients
+    show = [cue("c1")]
+    a.collect_local_changes(show)
+    assert a.flush() == 0  # still inside the debounce interval
+    assert feed.writes == 0
+
+    clock.advance(DEBOUNCE / 2)
+    show = [{**show[0], "start_time": 1.0}]
+    a.collect_local_changes(show)  # a new edit restarts the interval
+    clock.advance(DEBOUNCE / 2)
+    assert a.flush() == 0
+
+    clock.advance(DEBOUNCE)
+    assert a.flush() == 1
+    assert (feed.writes, feed.cues_written) == (1, 1)
+    assert b.apply_incoming([]) == [cue("c1", start_time=1.0)]
+
+
+def test_force_flush_ignores_the_debounce(clients, feed):
+    a, _ = clients
+    a.collect_local_changes([cue("c1")])
+    assert a.flush(force=True) == 1
+    assert feed.writes == 1
+
+
+def test_own_writes_are_not_echoed_back(clients, clock):
+    a, b = clients
+    send(a, [cue("c1")], clock)
+    assert not a.has_incoming
+    assert a.apply_incoming([cue("c1")]) is None
+
+
+def test_applied_remote_edits_are_not_sent_back(clients, feed, clock):
+    a, b = clients
+    send(a, [cue("c1")], clock)
+    show_b = b.apply_incoming([])
+    assert b.collect_local_changes(show_b) == 0
+    clock.advance()
+    assert b.flush() == 0
+    assert feed.writes == 1
+
+
+def test_pending_local_edit_wins_over_remote_edit(clients, clock):
+    a, b = clients
+    show_a = [cue("c1")]
+    send(a, show_a, clock)
+    show_b = b.apply_incoming([])
+
+    # Both edit c1; b's edit is still waiting for its debounce
+    send(a, [cue("c1", start_time=1.0)], clock)
+    show_b = [cue("c1", start_time=2.0)]
+    b.collect_local_changes(show_b)
+    assert b.apply_incoming(show_b) is None
+
+    clock.advance()
+    b.flush()
+    assert a.apply_incoming(show_a) == [cue("c1", start_time=2.0)]
+
+
+def test_failed_write_is_retried(clients, feed, clock):
+    a, b = clients
+    feed.fail_writes = 1
+    assert send(a, [cue("c1")], clock) == 0
+    assert a.has_outgoing
+    assert feed.snapshot() == {}
+
+    assert a.flush() == 1
+    assert not a.has_outgoing
+    assert b.apply_incoming([]) == [cue("c1")]
+
+
+def test_late_joiner_receives_the_current_show(feed, clients, clock):
+    a, _ = clients
+    send(a, [cue("c1"), cue("c2")], clock)
+    c = ShowSync(feed, client_id="c", clock=clock)
+    assert c.apply_incoming([]) == [cue("c1"), cue("c2")]
+    c.close()
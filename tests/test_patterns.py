@@ -0,0 +1,96 @@
+"""Expansion of pattern cues into individual items."""
+
+from patterns import expand_cue, expand_fireworks, pattern_tail
+
+
+def cue(fw_id, start=0.0, parent=None, offset=0.0, **fields):
+    fw = {
+        "id": fw_id,
+        "name": fw_id,
+        "start_time": start,
+        "fuse_duration": 1.0,
+        "explosion_duration": 2.0,
+        "dependent_on": parent,
+        "dependency_offset": offset,
+        "cost": 1.0,
+        **fields,
+    }
+    fw["end_time"] = start + 3.0 + pattern_tail(fw)
+    return fw
+
+
+def schedule(fireworks):
+    """Recompute dependent start times the way the app does, in list order"""
+    by_id = {}
+    for fw in fireworks:
+        if fw["dependent_on"]:
+            parent = by_id[fw["dependent_on"]]
+            start = parent["end_time"] + fw["dependency_offset"]
+            fw = {**fw, "start_time": start}
+            fw["end_time"] = (
+                start
+                + fw["fuse_duration"]
+                + fw["explosion_duration"]
+                + pattern_tail(fw)
+            )
+        by_id[fw["id"]] = fw
+    return by_id
+
+
+def test_plain_cue_expands_to_itself():
+    fw = cue("a")
+    assert list(expand_cue(fw)) == [fw]
+
+
+def test_items_follow_the_pattern_offsets():
+    fw = cue("p", start=10.0, pattern_count=3, pattern_stagger=0.5)
+    items = list(expand_cue(fw))
+    assert [item["id"] for item in items] == ["p-1", "p-2", "p-3"]
+    assert [item["start_time"] for item in items] == [10.0, 10.5, 11.0]
+    assert all(item["pattern_id"] == "p" for item in items)
+
+
+def test_expanded_show_schedules_like_the_compact_one():
+    show = [
+        cue("root", start=5.0),
+        cue("p", parent="root", offset=1.0, pattern_count=3, pattern_stagger=0.5),
+        cue("child", parent="p", offset=2.0),
+    ]
+    compact = schedule(show)
+    expanded = list(expand_fireworks(show))
+    assert [item["dependent_on"] for item in expanded] == [
+        None,
+        "root",
+        "root",
+        "root",
+        "p-3",
+    ]
+
+    # Retime the parent: the items and the child move with it in both forms
+    show[0] = cue("root", start=20.0)
+    compact = schedule(show)
+    flat = schedule(
+        [{**expanded[0], "start_time": 20.0, "end_time": 23.0}] + expanded[1:]
+    )
+    assert flat["p-1"]["start_time"] == compact["p"]["start_time"]
+    assert flat["p-3"]["start_time"] == compact["p"]["start_time"] + 1.0
+    assert flat["child"]["start_time"] == compact["child"]["start_time"]
+
+
+def test_export_drops_pattern_id():
+    show = [cue("p", pattern_count=2, pattern_stagger=1.0)]
+    assert all("pattern_id" not in item for item in expand_fireworks(show))
+    # The Gantt chart's expansion keeps it
+    assert all(item["pattern_id"] == "p" for item in expand_cue(show[0]))
+
+
+def test_items_keep_the_pattern_placement():
+    fw = cue("p", pattern_count=2, rack="A", x=10.0, y=-5.0, safety_radius=20.0)
+    for item in expand_fireworks([fw]):
+        assert (item["rack"], item["x"], item["y"], item["safety_radius"]) == (
+            "A",
+            10.0,
+            -5.0,
+            20.0,
+        )
+    assert "x" not in next(expand_fireworks([cue("q", pattern_count=2)]))
@@ -0,0 +1,148 @@
+"""Safety conflicts: grid sweep and incremental checker against brute force."""
+
+import itertools
+import math
+import random
+
+from safety import SafetyChecker, find_conflicts, hazard_interval, is_placed
+
+ZONES = [
+    {"name": "North stand", "x0": 0.0, "y0": 180.0, "x1": 200.0, "y1": 200.0},
+    {"name": "Gate", "x0": -20.0, "y0": -20.0, "x1": 0.0, "y1": 0.0},
+]
+
+
+def cue(fw_id, start, x=None, y=None, radius=10.0, fuse=1.0, explosion=4.0):
+    return {
+        "id": fw_id,
+        "name": fw_id,
+        "start_time": start,
+        "fuse_duration": fuse,
+        "explosion_duration": explosion,
+        "end_time": start + fuse + explosion,
+        "x": x,
+        "y": y,
+        "safety_radius": radius,
+    }
+
+
+def brute_force(fireworks, zones=()):
+    """Every conflict by checking all pairs of placed cues, as (kind, ids) keys"""
+    placed = [fw for fw in fireworks if is_placed(fw)]
+    found = set()
+    for a, b in itertools.combinations(placed, 2):
+        a0, a1 = hazard_interval(a)
+        b0, b1 = hazard_interval(b)
+        distance = math.hypot(a["x"] - b["x"], a["y"] - b["y"])
+        if a0 < b1 and b0 < a1 and distance < a["safety_radius"] + b["safety_radius"]:
+            found.add(("cues", tuple(sorted((a["id"], b["id"])))))
+    for fw in placed:
+        for zone in zones:
+            dx = max(zone["x0"] - fw["x"], 0, fw["x"] - zone["x1"])
+            dy = max(zone["y0"] - fw["y"], 0, fw["y"] - zone["y1"])
+            if math.hypot(dx, dy) < fw["safety_radius"]:
+                found.add(("audience", (fw["id"], zone["name"])))
+    return found
+
+
+def keys(conflicts):
+    return {
+        (c["kind"], c["ids"] if c["kind"] == "cues" else (c["ids"][0], c["names"][1]))
+        for c in conflicts
+    }
+
+
+def random_cue(rng, i):
+    placed = rng.random() < 0.8
+    return cue(
+        f"c{i:03d}",
+        start=round(rng.uniform(0, 60), 1),
+        x=round(rng.uniform(-10, 210), 1) if placed else None,
+        y=round(rng.uniform(-10, 210), 1) if placed else None,
+        radius=round(rng.uniform(0, 30), 1),
+        fuse=round(rng.uniform(0.5, 3), 1),
+        explosion=round(rng.uniform(0.5, 8), 1),
+    )
+
+
+def random_show(rng, size):
+    return [random_cue(rng, i) for i in range(size)]
+
+
+def test_overlapping_zones_conflict_only_while_both_are_live():
+    a = cue("a", 0.0, x=0.0, y=0.0)
+    near_same_time = cue("b", 2.0, x=15.0, y=0.0)
+    near_later = cue("c", 10.0, x=15.0, y=0.0)
+    far_same_time = cue("d", 0.0, x=100.0, y=0.0)
+    conflicts = find_conflicts([a, near_same_time, near_later, far_same_time])
+    assert keys(conflicts) == {("cues", ("a", "b"))}
+    assert conflicts[0]["distance"] == 15.0
+    assert conflicts[0]["start"] == 3.0  # b's burst
+
+
+def test_unplaced_cues_are_ignored():
+    show = [cue("a", 0.0, x=100.0, y=100.0), cue("b", 0.0)]
+    assert find_conflicts(show, ZONES) == []
+
+
+def test_audience_zone_reached_by_a_fallout_zone():
+    show = [cue("a", 0.0, x=100.0, y=175.0), cue("b", 0.0, x=100.0, y=100.0)]
+    assert keys(find_conflicts(show, ZONES)) == {("audience", ("a", "North stand"))}
+
+
+def test_find_conflicts_matches_brute_force():
+    rng = random.Random(1)
+    for cell_size in (5.0, 25.0, 100.0):
+        show = random_show(rng, 300)
+        assert keys(find_conflicts(show, ZONES, cell_size)) == brute_force(show, ZONES)
+
+
+def test_incremental_checker_matches_brute_force_through_edits():
+    rng = random.Random(2)
+    show = random_show(rng, 200)
+    checker = SafetyChecker()
+    checker.sync(show, ZONES)
+    assert keys(checker.conflicts()) == brute_force(show, ZONES)
+
+    next_id = len(show)
+    for _ in range(40):
+        show = list(show)
+        for _ in range(rng.randint(1, 5)):
+            action = rng.random()
+            position = rng.randrange(len(show))
+            fw = show[position]
+            if action < 0.3:  # move
+                show[position] = {
+                    **fw,
+                    "x": round(rng.uniform(-10, 210), 1),
+                    "y": round(rng.uniform(-10, 210), 1),
+                }
+            elif action < 0.5:  # retime
+                start = round(rng.uniform(0, 60), 1)
+                show[position] = {
+                    **fw,
+                    "start_time": start,
+                    "end_time": start + fw["fuse_duration"] + fw["explosion_duration"],
+                }
+            elif action < 0.6:  # take off the site map
+                show[position] = {**fw, "x": None, "y": None}
+            elif action < 0.8:
+                del show[position]
+            else:
+                show.append(random_cue(rng, next_id))
+                next_id += 1
+        checker.sync(show, ZONES)
+        assert keys(checker.conflicts()) == brute_force(show, ZONES)
+
+
+def test_changed_zones_are_rechecked():
+    rng = random.Random(3)
+    show = random_show(rng, 150)
+    checker = SafetyChecker()
+    checker.sync(show, ZONES)
+    assert not checker.sync(show, ZONES)  # nothing changed
+
+    checker.sync(show, ZONES[:1])
+    assert keys(checker.conflicts()) == brute_force(show, ZONES[:1])
+    checker.sync(show, [])
+    assert keys(checker.conflicts()) == brute_force(show)
@@ -0,0 +1,142 @@
+"""Keyed show diffs and three-way merges."""
+
+from show_diff import diff_shows, is_empty, three_way_merge
+
+
+def cue(fw_id, parent=None, **fields):
+    return {
+        "id": fw_id,
+        "name": fw_id,
+        "start_time": 0.0,
+        "end_time": 3.0,
+        "dependent_on": parent,
+        "dependency_offset": 0.0,
+        "cost": 1.0,
+        **fields,
+    }
+
+
+def edit(show, fw_id, **fields):
+    return [{**fw, **fields} if fw["id"] == fw_id else fw for fw in show]
+
+
+def without(show, fw_id):
+    return [fw for fw in show if fw["id"] != fw_id]
+
+
+BASE = [cue("a"), cue("b", parent="a"), cue("c")]
+
+
+# ------------------------------------------------------------------- diff_shows
+
+
+def test_identical_shows_have_an_empty_diff():
+    assert is_empty(diff_shows(BASE, list(BASE)))
+    assert is_empty(diff_shows(BASE, [dict(fw) for fw in BASE]))
+
+
+def test_diff_groups_changes_by_kind():
+    new = edit(BASE, "a", start_time=2.0, end_time=5.0)
+    new = edit(new, "b", dependent_on=None)
+    new = edit(new, "c", cost=9.0)
+    new = without(new, "a") + [new[0]]  # order does not matter
+    new = new + [cue("d")]
+    old = BASE + [cue("e")]
+    assert diff_shows(old, new) == {
+        "added": ["d"],
+        "removed": ["e"],
+        "retimed": ["a"],
+        "reparented": ["b"],
+        "modified": ["c"],
+    }
+
+
+def test_a_cue_can_change_in_several_ways():
+    new = edit(BASE, "b", dependent_on="c", end_time=4.0, name="B")
+    diff = diff_shows(BASE, new)
+    assert diff["retimed"] == diff["reparented"] == diff["modified"] == ["b"]
+
+
+# -------------------------------------------------------------- three_way_merge
+
+
+def test_one_sided_edits_are_taken():
+    ours = edit(BASE, "a", cost=5.0)
+    theirs = edit(BASE, "c", name="C")
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    assert merged == edit(edit(BASE, "a", cost=5.0), "c", name="C")
+    assert conflicts == []
+
+
+def test_one_sided_adds_and_deletes_are_taken():
+    ours = BASE + [cue("d")]
+    theirs = without(BASE, "c") + [cue("e")]
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    assert [fw["id"] for fw in merged] == ["a", "b", "d", "e"]
+    assert conflicts == []
+
+
+def test_different_fields_of_one_cue_merge():
+    ours = edit(BASE, "a", cost=5.0)
+    theirs = edit(BASE, "a", name="A")
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    assert merged[0] == {**BASE[0], "cost": 5.0, "name": "A"}
+    assert conflicts == []
+
+
+def test_same_field_edited_differently_keeps_ours():
+    ours = edit(BASE, "a", cost=5.0)
+    theirs = edit(BASE, "a", cost=7.0)
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    assert merged[0]["cost"] == 5.0
+    assert conflicts == [
+        {"id": "a", "field": "cost", "kind": "both edited", "ours": 5.0, "theirs": 7.0}
+    ]
+
+
+def test_same_edit_on_both_sides_is_not_a_conflict():
+    ours = edit(BASE, "a", cost=5.0)
+    theirs = edit(BASE, "a", cost=5.0)
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    assert merged == ours
+    assert conflicts == []
+
+
+def test_edited_and_deleted_keeps_the_edited_cue():
+    ours = without(BASE, "c")
+    theirs = edit(BASE, "c", cost=5.0)
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    assert merged[-1] == {**BASE[2], "cost": 5.0}
+    assert [(c["id"], c["kind"], c["ours"]) for c in conflicts] == [
+        ("c", "edited and deleted", None)
+    ]
+
+    merged, conflicts = three_way_merge(BASE, theirs, ours)
+    assert merged[-1] == {**BASE[2], "cost": 5.0}
+    assert conflicts[0]["theirs"] is None
+
+
+def test_derived_times_of_dependent_cues_are_not_conflicts():
+    # Both sides retimed the parent, so b's computed times differ on each side
+    ours = edit(edit(BASE, "a", end_time=4.0), "b", start_time=4.0, end_time=7.0)
+    theirs = edit(edit(BASE, "a", end_time=5.0), "b", start_time=5.0, end_time=8.0)
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    assert [(c["id"], c["field"]) for c in conflicts] == [("a", "end_time")]
+
+
+def test_orphaned_dependents_lose_their_parent():
+    ours = without(BASE, "a")
+    ours = edit(ours, "b", dependent_on=None)  # we deleted a and detached b
+    theirs = BASE + [cue("d", parent="a", dependency_offset=2.0)]
+    merged, conflicts = three_way_merge(BASE, ours, theirs)
+    d = next(fw for fw in merged if fw["id"] == "d")
+    assert (d["dependent_on"], d["dependency_offset"]) == (None, 0)
+    assert conflicts == [
+        {
+            "id": "d",
+            "field": "dependent_on",
+            "kind": "missing parent",
+            "ours": "a",
+            "theirs": None,
+        }
+    ]